@@ -14,14 +14,20 @@
 
 __version__ = 'devel'
 
+import bisect
 import errno
+import os
 import re
 import select
 import sys
 import inspect
+import json
+import tempfile
+import threading
+import time
 import traceback
-from StringIO import StringIO
-from SimpleXMLRPCServer import SimpleXMLRPCServer
+from Queue import Queue
+from SimpleXMLRPCServer import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
 from xmlrpclib import Binary
 try:
     import signal
@@ -36,6 +42,107 @@ except ImportError:
 BINARY = re.compile('[\x00-\x08\x0B\x0C\x0E-\x1F]')
 NON_ASCII = re.compile('[\x80-\xff]')
 
+SERIAL = 'serial'
+PARALLEL = 'parallel'
+
+def _monotonic_timer():
+    """Returns function giving seconds from a clock which never goes
+    backwards, falling back to time.time where no such clock is found."""
+    if sys.platform == 'cli':
+        from System.Diagnostics import Stopwatch
+        frequency = float(Stopwatch.Frequency)
+        return lambda: Stopwatch.GetTimestamp() / frequency
+    if sys.platform.startswith('java'):
+        from java.lang import System
+        return lambda: System.nanoTime() / 1e9
+    if sys.platform == 'win32':
+        return time.clock
+    if sys.platform.startswith('linux'):
+        try:
+            return _linux_monotonic()
+        except (ImportError, OSError, AttributeError):
+            pass
+    return time.time
+
+
+def _linux_monotonic():
+    import ctypes
+    import ctypes.util
+
+    class timespec(ctypes.Structure):
+        _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+    library = ctypes.CDLL(ctypes.util.find_library('rt') or
+                          ctypes.util.find_library('c'), use_errno=True)
+    clock_gettime = library.clock_gettime
+    clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(timespec)]
+    CLOCK_MONOTONIC = 1
+
+    def monotonic():
+        # own structure per call, the timer is used from several threads
+        now = timespec()
+        if clock_gettime(CLOCK_MONOTONIC, ctypes.byref(now)):
+            raise OSError(ctypes.get_errno(), 'clock_gettime failed')
+        return now.tv_sec + now.tv_nsec * 1e-9
+    monotonic()
+    return monotonic
+
+# high resolution monotonic timer for keyword latencies
+_timer = _monotonic_timer()
+
+
+def _replace_file(source, target):
+    """Renames source over target in one step. On Windows os.rename does
+    not replace existing files, so File.Replace or MoveFileEx is used."""
+    if sys.platform == 'cli':
+        from System.IO import File
+        if File.Exists(target):
+            File.Replace(source, target, None)
+        else:
+            File.Move(source, target)
+    elif sys.platform == 'win32':
+        import ctypes
+        MOVEFILE_REPLACE_EXISTING = 1
+        if not ctypes.windll.kernel32.MoveFileExW(
+                unicode(source), unicode(target), MOVEFILE_REPLACE_EXISTING):
+            raise ctypes.WinError()
+    else:
+        os.rename(source, target)
+
+
+def concurrency(lane):
+    """Decorator marking the lane a keyword runs on in threaded mode.
+
+    Keywords in the ``SERIAL`` lane (the default) never run at the same
+    time as each other. Keywords in the ``PARALLEL`` lane, e.g. ones that
+    do not touch the UI, can run concurrently with anything.
+    """
+    if lane not in (SERIAL, PARALLEL):
+        raise ValueError("Unknown concurrency lane '%s'." % lane)
+    def decorator(kw):
+        kw.robot_concurrency = lane
+        return kw
+    return decorator
+
+
+class Blob(object):
+    """Keyword return value which is kept on the server and fetched by the
+    client in chunks with ``Fetch Blob`` instead of being returned whole.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+
+class FileBlob(object):
+    """Like :class:`Blob` but the content is read from ``path`` only when
+    fetched. If ``delete`` is true, the file is removed with the blob.
+    """
+
+    def __init__(self, path, delete=False):
+        self.path = path
+        self.delete = delete
+
 
 class RobotRemoteServer(SimpleXMLRPCServer):
     allow_reuse_address = True
@@ -43,7 +150,10 @@ class RobotRemoteServer(SimpleXMLRPCServer):
     _fatal_exceptions = (SystemExit, KeyboardInterrupt)
 
     def __init__(self, library, host='127.0.0.1', port=8270, port_file=None,
-                 allow_stop=True):
+                 allow_stop=True, threads=0, keep_alive=None,
+                 max_connections=None, spec_file=None, output_limit=1048576,
+                 blob_budget=67108864, blob_ttl=600, metrics_file=None,
+                 metrics_path=None, metrics_interval=10):
         """Configure and start-up remote server.
 
         :param library:     Test library instance or module to host.
@@ -56,11 +166,65 @@ class RobotRemoteServer(SimpleXMLRPCServer):
                             no such file is written.
         :param allow_stop:  Allow/disallow stopping the server using
                             ``Stop Remote Server`` keyword.
+        :param threads:     Number of worker threads serving requests.
+                            ``0`` serves requests one by one in the main
+                            thread. Keywords in the serial lane (see
+                            :func:`concurrency`) are still run one at a time.
+        :param keep_alive:  Seconds an idle HTTP/1.1 connection is kept open
+                            for further requests. ``None`` closes every
+                            connection after one request. Without threads
+                            a kept connection blocks other clients until
+                            it is closed or idle.
+        :param max_connections: Maximum number of connections kept alive at
+                            the same time, others are closed after one
+                            request. Defaults to one less than ``threads``
+                            (at least one), so a worker is always left
+                            for new connections.
+        :param spec_file:   File to write keyword names, arguments and
+                            documentation to as JSON. ``None`` means no
+                            such file is written.
+        :param output_limit: Maximum number of characters of stdout and
+                            stderr, each, captured from one keyword. The
+                            rest is replaced with a truncation marker.
+        :param blob_budget: Maximum number of bytes of blobs kept in memory.
+                            Blobs not fitting are kept in temporary files.
+        :param blob_ttl:    Seconds a blob is kept after it was last used.
+        :param metrics_file: File to write keyword metrics to in Prometheus
+                            text format every ``metrics_interval`` seconds
+                            and when the server stops. ``None`` means no
+                            such file is written.
+        :param metrics_path: HTTP path, e.g. ``'/metrics'``, serving keyword
+                            metrics in Prometheus text format with GET on
+                            the same port. ``None`` disables it.
         """
-        SimpleXMLRPCServer.__init__(self, (host, int(port)), logRequests=False)
+        SimpleXMLRPCServer.__init__(self, (host, int(port)),
+                                    requestHandler=_RequestHandler,
+                                    logRequests=False)
+        self._keep_alive = float(keep_alive) if keep_alive else None
+        if max_connections is None:
+            max_connections = max(int(threads) - 1, 1)
+        self._max_connections = int(max_connections)
+        self._connections = 0
+        self._connections_lock = threading.Lock()
         self._library = library
         self._allow_stop = allow_stop
         self._shutdown = False
+        self._threads = int(threads)
+        self._pool = _WorkerPool(self._threads) if self._threads else None
+        self._serial_lock = threading.Lock()
+        self._output_limit = int(output_limit)
+        self._output_buffers = (_CaptureBuffer(self._output_limit),
+                                _CaptureBuffer(self._output_limit))
+        self._output_statistics = {}
+        self._blobs = _BlobStore(int(blob_budget), float(blob_ttl))
+        self._output_lock = threading.Lock()
+        self._metrics = _KeywordMetrics()
+        self._metrics_file = metrics_file
+        self._metrics_path = metrics_path
+        self._metrics_interval = float(metrics_interval)
+        self._keywords = _KeywordTable(self)
+        if spec_file:
+            self.write_keyword_spec(spec_file)
         self._register_functions()
         self._register_signal_handlers()
         self._announce_start(port_file)
@@ -69,9 +233,12 @@ class RobotRemoteServer(SimpleXMLRPCServer):
     def _register_functions(self):
         self.register_function(self.get_keyword_names)
         self.register_function(self.run_keyword)
+        self.register_function(self.run_keywords)
         self.register_function(self.get_keyword_arguments)
         self.register_function(self.get_keyword_documentation)
         self.register_function(self.stop_remote_server)
+        self.register_function(self.get_output_statistics)
+        self.register_function(self.get_metrics)
 
     def _register_signal_handlers(self):
         def stop_with_signal(signum, frame):
@@ -97,12 +264,58 @@ class RobotRemoteServer(SimpleXMLRPCServer):
             self.timeout = 0.5
         elif sys.platform.startswith('java'):
             self.socket.settimeout(0.5)
-        while not self._shutdown:
-            try:
-                self.handle_request()
-            except (OSError, select.error), err:
-                if err.args[0] != errno.EINTR:
-                    raise
+        if self._pool:
+            self._install_stream_routers()
+        stopped = threading.Event()
+        writer = None
+        if self._metrics_file:
+            writer = self._start_metrics_writer(stopped)
+        try:
+            while not self._shutdown:
+                try:
+                    self.handle_request()
+                except (OSError, select.error), err:
+                    if err.args[0] != errno.EINTR:
+                        raise
+        finally:
+            stopped.set()
+            if self._pool:
+                self._pool.stop((self._keep_alive or 0) + 1)
+            self._blobs.clear()
+            if writer:
+                writer.join()
+            if self._metrics_file:
+                self.write_metrics(self._metrics_file)
+
+    def _start_metrics_writer(self, stopped):
+        # own thread so that the file is updated also while a keyword
+        # runs in the serving thread when threads are not used
+        def write():
+            while not stopped.wait(self._metrics_interval):
+                try:
+                    self.write_metrics(self._metrics_file)
+                except (IOError, OSError), err:
+                    self._write_to_stream('Writing metrics failed: %s' % err,
+                                          sys.__stderr__)
+        writer = threading.Thread(target=write)
+        writer.daemon = True
+        writer.start()
+        return writer
+
+    def process_request(self, request, client_address):
+        if not self._pool:
+            SimpleXMLRPCServer.process_request(self, request, client_address)
+        else:
+            self._pool.submit(self._process_request_in_worker, request,
+                              client_address)
+
+    def _process_request_in_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
 
     def stop_remote_server(self):
         prefix = 'Robot Framework remote server at %s:%s ' % self.server_address
@@ -113,7 +326,23 @@ class RobotRemoteServer(SimpleXMLRPCServer):
             self._log(prefix + 'does not allow stopping.', 'WARN')
         return self._shutdown
 
+    def refresh_keyword_metadata(self):
+        """Introspects the library again, e.g. after keywords were added."""
+        self._keywords = _KeywordTable(self)
+
+    def write_keyword_spec(self, path):
+        """Writes keyword metadata to ``path`` as JSON."""
+        spec = self._keywords.to_spec(self._library)
+        sf = open(path, 'w')
+        try:
+            json.dump(spec, sf, indent=2, sort_keys=True)
+        finally:
+            sf.close()
+
     def get_keyword_names(self):
+        return list(self._keywords.names)
+
+    def _introspect_keyword_names(self):
         get_kw_names = getattr(self._library, 'get_keyword_names', None) or \
                        getattr(self._library, 'getKeywordNames', None)
         if self._is_function_or_method(get_kw_names):
@@ -121,7 +350,7 @@ class RobotRemoteServer(SimpleXMLRPCServer):
         else:
             names = [attr for attr in dir(self._library) if attr[0] != '_' and
                      self._is_function_or_method(getattr(self._library, attr))]
-        return names + ['stop_remote_server']
+        return names + ['stop_remote_server', 'fetch_blob', 'release_blob']
 
     def _is_function_or_method(self, item):
         # Cannot use inspect.isroutine because it returns True for
@@ -131,9 +360,19 @@ class RobotRemoteServer(SimpleXMLRPCServer):
     def run_keyword(self, name, args, kwargs=None):
         args, kwargs = self._handle_binary_args(args, kwargs or {})
         result = {'status': 'FAIL'}
+        lock = self._get_lane_lock(name)
+        elapsed = None
         self._intercept_std_streams()
         try:
-            return_value = self._get_keyword(name)(*args, **kwargs)
+            if lock:
+                lock.acquire()
+            start = _timer()
+            try:
+                return_value = self._get_keyword(name)(*args, **kwargs)
+            finally:
+                elapsed = _timer() - start
+                if lock:
+                    lock.release()
         except:
             exc_type, exc_value, exc_tb = sys.exc_info()
             self._add_to_result(result, 'error',
@@ -156,9 +395,60 @@ class RobotRemoteServer(SimpleXMLRPCServer):
                                     self._get_error_message(exc_type, exc_value))
             else:
                 result['status'] = 'PASS'
-        self._add_to_result(result, 'output', self._restore_std_streams())
+        self._add_to_result(result, 'output', self._restore_std_streams(name))
+        if elapsed is not None:
+            self._metrics.record(name, elapsed, result['status'] != 'PASS')
         return result
 
+    def run_keywords(self, keywords):
+        """Runs keywords given as ``(name, args[, kwargs])`` in order and
+        returns their results in the same form as ``run_keyword``.
+
+        Execution stops at the first keyword that does not pass, so the
+        result list may be shorter than the given list of keywords.
+        """
+        results = []
+        for keyword in keywords:
+            name = keyword[0]
+            args = keyword[1] if len(keyword) > 1 else []
+            kwargs = keyword[2] if len(keyword) > 2 else None
+            result = self.run_keyword(name, args, kwargs)
+            results.append(result)
+            if result['status'] != 'PASS':
+                break
+        return results
+
+    def _open_connection(self):
+        """Returns keep-alive timeout for a new connection or ``None`` if
+        the connection should be closed after one request."""
+        if not self._keep_alive:
+            return None
+        self._connections_lock.acquire()
+        try:
+            if self._connections >= self._max_connections:
+                return None
+            self._connections += 1
+            return self._keep_alive
+        finally:
+            self._connections_lock.release()
+
+    def _close_connection(self):
+        self._connections_lock.acquire()
+        try:
+            self._connections -= 1
+        finally:
+            self._connections_lock.release()
+
+    def _get_lane_lock(self, name):
+        if not self._pool:
+            return None
+        lane = self._keywords.lanes.get(name)
+        if lane is None:
+            lane = getattr(self._get_keyword(name), 'robot_concurrency', SERIAL)
+        if lane == PARALLEL:
+            return None
+        return self._serial_lock
+
     def _handle_binary_args(self, args, kwargs):
         args = [self._handle_binary_arg(a) for a in args]
         kwargs = dict([(k, self._handle_binary_arg(v)) for k, v in kwargs.items()])
@@ -174,13 +464,17 @@ class RobotRemoteServer(SimpleXMLRPCServer):
             result[key] = value
 
     def get_keyword_arguments(self, name):
+        if name in self._keywords:
+            return list(self._keywords.arguments[name])
         kw = self._get_keyword(name)
         if not kw:
             return []
         return self._arguments_from_kw(kw)
 
     def _arguments_from_kw(self, kw):
-        args, varargs, kwargs, defaults = inspect.getargspec(kw)
+        # decorators wrapping keywords expose the original as robot_wrapped
+        spec = getattr(kw, 'robot_wrapped', kw)
+        args, varargs, kwargs, defaults = inspect.getargspec(spec)
         if inspect.ismethod(kw):
             args = args[1:]  # drop 'self'
         if defaults:
@@ -193,6 +487,11 @@ class RobotRemoteServer(SimpleXMLRPCServer):
         return args
 
     def get_keyword_documentation(self, name):
+        if name in self._keywords.documentation:
+            return self._keywords.documentation[name]
+        return self._introspect_documentation(name)
+
+    def _introspect_documentation(self, name):
         if name == '__intro__':
             return inspect.getdoc(self._library) or ''
         if name == '__init__' and inspect.ismodule(self._library):
@@ -200,8 +499,8 @@ class RobotRemoteServer(SimpleXMLRPCServer):
         return inspect.getdoc(self._get_keyword(name)) or ''
 
     def _get_keyword(self, name):
-        if name == 'stop_remote_server':
-            return self.stop_remote_server
+        if name in ('stop_remote_server', 'fetch_blob', 'release_blob'):
+            return getattr(self, name)
         kw = getattr(self._library, name, None)
         if not self._is_function_or_method(kw):
             return None
@@ -237,7 +536,27 @@ class RobotRemoteServer(SimpleXMLRPCServer):
     def _get_error_attribute(self, exc_value, name):
         return bool(getattr(exc_value, 'ROBOT_%s_ON_FAILURE' % name, False))
 
+    @concurrency(PARALLEL)
+    def fetch_blob(self, handle, offset=0, size=65536):
+        """Returns ``size`` bytes of blob ``handle`` starting from
+        ``offset``. Text blobs are stored UTF-8 encoded and chunks with
+        non-ASCII bytes are returned as binary, so a chunk may end in the
+        middle of a character. Empty string means the end of the blob was
+        reached.
+        """
+        chunk = self._blobs.read(handle, int(offset), int(size))
+        if BINARY.search(chunk) or NON_ASCII.search(chunk):
+            return Binary(chunk)
+        return chunk
+
+    @concurrency(PARALLEL)
+    def release_blob(self, handle):
+        """Frees blob ``handle`` before it expires."""
+        return self._blobs.release(handle)
+
     def _handle_return_value(self, ret):
+        if isinstance(ret, (Blob, FileBlob)):
+            return self._blobs.put(ret)
         if isinstance(ret, basestring):
             return self._handle_binary_result(ret)
         if isinstance(ret, (int, long, float)):
@@ -272,18 +591,66 @@ class RobotRemoteServer(SimpleXMLRPCServer):
             return self._handle_binary_result(item)
         return item
 
+    def get_output_statistics(self):
+        """Returns number of calls and characters of output captured per
+        keyword."""
+        self._output_lock.acquire()
+        try:
+            return dict((name, {'calls': calls, 'captured': captured})
+                        for name, (calls, captured)
+                        in self._output_statistics.items())
+        finally:
+            self._output_lock.release()
+
+    def get_metrics(self):
+        """Returns calls, errors, total and maximum time and p50, p95 and
+        p99 latencies (seconds) of keywords run so far, per keyword."""
+        return self._metrics.summary()
+
+    def write_metrics(self, path):
+        """Writes keyword metrics to ``path`` in Prometheus text format.
+
+        The file is replaced only after the new content is written, so
+        collectors never read a partial file.
+        """
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                   prefix=os.path.basename(path) + '.')
+        # mkstemp creates the file readable only by the owner
+        os.chmod(tmp, 0644)
+        mf = os.fdopen(fd, 'w')
+        try:
+            mf.write(self._metrics.to_prometheus())
+        finally:
+            mf.close()
+        _replace_file(tmp, path)
+
+    def _install_stream_routers(self):
+        sys.stdout = _ThreadLocalStream(sys.__stdout__, self._output_limit)
+        sys.stderr = _ThreadLocalStream(sys.__stderr__, self._output_limit)
+
     def _intercept_std_streams(self):
-        sys.stdout = StringIO()
-        sys.stderr = StringIO()
-
-    def _restore_std_streams(self):
-        stdout = sys.stdout.getvalue()
-        stderr = sys.stderr.getvalue()
-        close = [sys.stdout, sys.stderr]
-        sys.stdout = sys.__stdout__
-        sys.stderr = sys.__stderr__
-        for stream in close:
-            stream.close()
+        if self._pool:
+            sys.stdout.capture()
+            sys.stderr.capture()
+        else:
+            for buffer in self._output_buffers:
+                buffer.reset()
+            sys.stdout, sys.stderr = self._output_buffers
+
+    def _restore_std_streams(self, name=None):
+        if self._pool:
+            stdout = sys.stdout.release()
+            stderr = sys.stderr.release()
+        else:
+            stdout, stderr = sys.stdout, sys.stderr
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+        if name is not None:
+            self._record_output(name, stdout.size + stderr.size)
+        if not (stdout.size or stderr.size):
+            return ''
+        stdout = stdout.getvalue()
+        stderr = stderr.getvalue()
         if stdout and stderr:
             if not stderr.startswith(('*TRACE*', '*DEBUG*', '*INFO*', '*HTML*',
                                       '*WARN*')):
@@ -292,11 +659,20 @@ class RobotRemoteServer(SimpleXMLRPCServer):
                 stdout += '\n'
         return self._handle_binary_result(stdout + stderr)
 
+    def _record_output(self, name, size):
+        self._output_lock.acquire()
+        try:
+            calls, captured = self._output_statistics.get(name, (0, 0))
+            self._output_statistics[name] = (calls + 1, captured + size)
+        finally:
+            self._output_lock.release()
+
     def _log(self, msg, level=None):
         if level:
             msg = '*%s* %s' % (level.upper(), msg)
         self._write_to_stream(msg, sys.stdout)
-        if sys.__stdout__ is not sys.stdout:
+        if sys.__stdout__ is not sys.stdout \
+                and getattr(sys.stdout, 'capturing', True):
             self._write_to_stream(msg, sys.__stdout__)
 
     def _write_to_stream(self, msg, stream):
@@ -304,6 +680,388 @@ class RobotRemoteServer(SimpleXMLRPCServer):
         stream.flush()
 
 
+class _KeywordMetrics(object):
+    """Call and error counts and latency histograms per keyword.
+
+    Latencies are counted in fixed buckets growing by factor sqrt(2) from
+    50 microseconds to about 2.5 minutes, so recording is a lookup and an
+    increment and percentiles are accurate to the bucket.
+    """
+    BOUNDS = tuple(0.00005 * 2 ** (i / 2.0) for i in range(44))
+
+    def __init__(self):
+        self._keywords = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed, failed=False):
+        index = bisect.bisect_left(self.BOUNDS, elapsed)
+        self._lock.acquire()
+        try:
+            stats = self._keywords.get(name)
+            if stats is None:
+                stats = self._keywords[name] = \
+                    [0, 0, 0.0, 0.0, [0] * (len(self.BOUNDS) + 1)]
+            stats[0] += 1
+            if failed:
+                stats[1] += 1
+            stats[2] += elapsed
+            stats[3] = max(stats[3], elapsed)
+            stats[4][index] += 1
+        finally:
+            self._lock.release()
+
+    def _snapshot(self):
+        self._lock.acquire()
+        try:
+            return sorted((name, list(stats[:4]) + [list(stats[4])])
+                          for name, stats in self._keywords.items())
+        finally:
+            self._lock.release()
+
+    def summary(self):
+        summary = {}
+        for name, (calls, errors, total, longest, buckets) in self._snapshot():
+            summary[name] = {'calls': calls, 'errors': errors,
+                             'total': total, 'max': longest,
+                             'p50': self._percentile(buckets, 0.50, longest),
+                             'p95': self._percentile(buckets, 0.95, longest),
+                             'p99': self._percentile(buckets, 0.99, longest)}
+        return summary
+
+    def _percentile(self, buckets, fraction, longest):
+        wanted = fraction * sum(buckets)
+        seen = 0
+        for index, count in enumerate(buckets):
+            seen += count
+            if count and seen >= wanted:
+                if index < len(self.BOUNDS):
+                    return min(self.BOUNDS[index], longest)
+                return longest
+        return 0.0
+
+    def to_prometheus(self):
+        # samples of a metric family must follow its TYPE line together
+        keywords = [('keyword="%s"' % name.replace('\\', '\\\\')
+                     .replace('"', '\\"'), stats)
+                    for name, stats in self._snapshot()]
+        lines = ['# TYPE robot_keyword_calls_total counter']
+        for label, (calls, _, _, _, _) in keywords:
+            lines.append('robot_keyword_calls_total{%s} %d' % (label, calls))
+        lines.append('# TYPE robot_keyword_errors_total counter')
+        for label, (_, errors, _, _, _) in keywords:
+            lines.append('robot_keyword_errors_total{%s} %d' % (label, errors))
+        lines.append('# TYPE robot_keyword_duration_seconds histogram')
+        for label, (calls, _, total, _, buckets) in keywords:
+            cumulative = 0
+            for bound, count in zip(self.BOUNDS, buckets):
+                cumulative += count
+                lines.append('robot_keyword_duration_seconds_bucket{%s,le="%g"} %d'
+                             % (label, bound, cumulative))
+            lines.append('robot_keyword_duration_seconds_bucket{%s,le="+Inf"} %d'
+                         % (label, calls))
+            lines.append('robot_keyword_duration_seconds_sum{%s} %f'
+                         % (label, total))
+            lines.append('robot_keyword_duration_seconds_count{%s} %d'
+                         % (label, calls))
+        return '\n'.join(lines) + '\n'
+
+
+class _BlobStore(object):
+    """Blobs kept for chunked fetching, limited by memory budget and age.
+
+    Content is always kept as bytes, text is UTF-8 encoded, so offsets and
+    sizes mean the same for blobs in memory, spilled blobs and files.
+    """
+
+    def __init__(self, budget, ttl):
+        self._budget = budget
+        self._ttl = ttl
+        self._blobs = {}
+        self._memory = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def put(self, blob):
+        self._lock.acquire()
+        try:
+            self._expire()
+            self._counter += 1
+            handle = 'blob-%d' % self._counter
+            if isinstance(blob, FileBlob):
+                entry = _BlobEntry(None, blob.path, blob.delete)
+            else:
+                data = blob.data
+                if isinstance(data, unicode):
+                    data = data.encode('UTF-8')
+                if len(data) > self._budget - self._memory:
+                    entry = _BlobEntry(None, self._spill(data), True)
+                else:
+                    entry = _BlobEntry(data, None, False)
+                    self._memory += entry.size
+            self._blobs[handle] = entry
+            return {'blob': handle, 'size': entry.size}
+        finally:
+            self._lock.release()
+
+    def _spill(self, data):
+        fd, path = tempfile.mkstemp(prefix='robotblob')
+        bf = os.fdopen(fd, 'wb')
+        try:
+            bf.write(data)
+        finally:
+            bf.close()
+        return path
+
+    def read(self, handle, offset, size):
+        self._lock.acquire()
+        try:
+            self._expire()
+            entry = self._blobs.get(handle)
+            if entry is None:
+                raise RuntimeError("No blob '%s'. It was released or it "
+                                   "expired." % handle)
+            return entry.read(offset, size)
+        finally:
+            self._lock.release()
+
+    def release(self, handle):
+        self._lock.acquire()
+        try:
+            entry = self._blobs.pop(handle, None)
+            if entry is None:
+                return False
+            self._discard(entry)
+            return True
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            for entry in self._blobs.values():
+                self._discard(entry)
+            self._blobs.clear()
+        finally:
+            self._lock.release()
+
+    def _expire(self):
+        now = time.time()
+        for handle, entry in self._blobs.items():
+            if now - entry.used > self._ttl:
+                del self._blobs[handle]
+                self._discard(entry)
+
+    def _discard(self, entry):
+        if entry.data is not None:
+            self._memory -= entry.size
+        entry.close()
+
+
+class _BlobEntry(object):
+
+    def __init__(self, data, path, delete):
+        self.data = data
+        self.path = path
+        self.delete = delete
+        self.size = len(data) if data is not None else os.path.getsize(path)
+        self.used = time.time()
+
+    def read(self, offset, size):
+        self.used = time.time()
+        if self.data is not None:
+            return self.data[offset:offset + size]
+        bf = open(self.path, 'rb')
+        try:
+            bf.seek(offset)
+            return bf.read(size)
+        finally:
+            bf.close()
+
+    def close(self):
+        if self.delete and self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class _KeywordTable(object):
+    """Keyword names, arguments, documentation and lanes introspected once.
+
+    Tables are not modified after creation; the server replaces the whole
+    table when metadata is refreshed.
+    """
+
+    def __init__(self, server):
+        self.names = tuple(server._introspect_keyword_names())
+        arguments = {}
+        documentation = {}
+        lanes = {}
+        for name in self.names:
+            kw = server._get_keyword(name)
+            arguments[name] = tuple(server._arguments_from_kw(kw)) if kw else ()
+            documentation[name] = server._introspect_documentation(name)
+            lanes[name] = getattr(kw, 'robot_concurrency', SERIAL)
+        for name in '__intro__', '__init__':
+            documentation[name] = server._introspect_documentation(name)
+        self.arguments = arguments
+        self.documentation = documentation
+        self.lanes = lanes
+
+    def __contains__(self, name):
+        return name in self.arguments
+
+    def to_spec(self, library):
+        return {'name': getattr(library, '__name__', None) or
+                        type(library).__name__,
+                'doc': self.documentation['__intro__'],
+                'init_doc': self.documentation['__init__'],
+                'keywords': [{'name': name,
+                              'args': list(self.arguments[name]),
+                              'doc': self.documentation[name],
+                              'concurrency': self.lanes[name]}
+                             for name in self.names]}
+
+
+class _RequestHandler(SimpleXMLRPCRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        self.timeout = self.server._open_connection()
+        self._keep_alive = self.timeout is not None
+        SimpleXMLRPCRequestHandler.setup(self)
+
+    def finish(self):
+        try:
+            SimpleXMLRPCRequestHandler.finish(self)
+        finally:
+            if self._keep_alive:
+                self.server._close_connection()
+
+    def end_headers(self):
+        if not self._keep_alive or self.server._shutdown:
+            self.send_header('Connection', 'close')
+        SimpleXMLRPCRequestHandler.end_headers(self)
+
+    def do_GET(self):
+        path = self.server._metrics_path
+        if not path or self.path.split('?')[0] != path:
+            self.report_404()
+            return
+        body = self.server._metrics.to_prometheus()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # e.g. timeouts of idle connections are not worth reporting
+        if self.server.logRequests:
+            SimpleXMLRPCRequestHandler.log_message(self, format, *args)
+
+
+class _WorkerPool(object):
+
+    def __init__(self, size):
+        self._tasks = Queue()
+        self._workers = [threading.Thread(target=self._work)
+                         for _ in range(size)]
+        for worker in self._workers:
+            worker.daemon = True
+            worker.start()
+
+    def submit(self, function, *args):
+        self._tasks.put((function, args))
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            function, args = task
+            function(*args)
+
+    def stop(self, timeout=1.0):
+        for _ in self._workers:
+            self._tasks.put(None)
+        deadline = time.time() + timeout
+        for worker in self._workers:
+            worker.join(max(deadline - time.time(), 0))
+
+
+class _CaptureBuffer(object):
+    """Reusable, size limited replacement of StringIO for keyword output.
+
+    ``size`` counts all written characters, also those beyond the limit.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.reset()
+
+    def reset(self):
+        self._chunks = []
+        self._kept = 0
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        if self._kept < self.limit:
+            data = data[:self.limit - self._kept]
+            self._chunks.append(data)
+            self._kept += len(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+    def getvalue(self):
+        value = ''.join(self._chunks)
+        if self.size > self._kept:
+            value += '\n[... %d characters truncated ...]\n' \
+                % (self.size - self._kept)
+        return value
+
+
+class _ThreadLocalStream(object):
+    """Routes writes to a per-thread buffer while a keyword runs in it."""
+
+    def __init__(self, stream, limit):
+        self._stream = stream
+        self._limit = limit
+        self._local = threading.local()
+
+    @property
+    def capturing(self):
+        return getattr(self._local, 'buffer', None) is not None
+
+    def capture(self):
+        buffer = getattr(self._local, 'reusable', None)
+        if buffer is None:
+            buffer = self._local.reusable = _CaptureBuffer(self._limit)
+        buffer.reset()
+        self._local.buffer = buffer
+
+    def release(self):
+        buffer = self._local.buffer
+        self._local.buffer = None
+        return buffer
+
+    def write(self, data):
+        (getattr(self._local, 'buffer', None) or self._stream).write(data)
+
+    def flush(self):
+        if not self.capturing:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
 if __name__ == '__main__':
     import xmlrpclib
 
@@ -324,14 +1082,35 @@ if __name__ == '__main__':
             print 'Remote server running at %s.' % uri
         return server
 
+    def bench(uri, calls=200, clients=4):
+        if test(uri) is None:
+            return
+        def client():
+            server = xmlrpclib.ServerProxy(uri)
+            for _ in range(calls):
+                server.get_keyword_names()
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - start
+        print '%d calls from %d clients in %.2fs: %.1f calls/s, %.2f ms/call.' \
+            % (calls * clients, clients, elapsed, calls * clients / elapsed,
+               1000.0 * elapsed / calls)
+
     def parse_args(args):
-        actions = {'stop': stop, 'test': test}
-        if not args or len(args) > 2 or args[0] not in actions:
-            sys.exit('Usage:  python -m robotremoteserver test|stop [uri]')
-        uri = len(args) == 2 and args[1] or 'http://127.0.0.1:8270'
+        actions = {'stop': stop, 'test': test, 'bench': bench}
+        if not args or len(args) > 4 or args[0] not in actions \
+                or len(args) > 2 and args[0] != 'bench':
+            sys.exit('Usage:  python -m robotremoteserver test|stop [uri]\n'
+                     '        python -m robotremoteserver bench [uri] '
+                     '[calls] [clients]')
+        uri = len(args) >= 2 and args[1] or 'http://127.0.0.1:8270'
         if '://' not in uri:
             uri = 'http://' + uri
-        return actions[args[0]], uri
+        return actions[args[0]], uri, [int(a) for a in args[2:]]
 
-    action, uri = parse_args(sys.argv[1:])
-    action(uri)
+    action, uri, options = parse_args(sys.argv[1:])
+    action(uri, *options)
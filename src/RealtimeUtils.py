@@ -1,21 +1,90 @@
 import sys
 import os
+import gzip
+import tempfile
 import zipfile
-import zlib
-import urllib
+import urllib2
 import re
+from collections import deque
 
 from robot import utils
 from robot.api import logger
-from robot.libraries.BuiltIn import BuiltIn
 from robot.version import get_version
 
-class RealtimeUtils(object):
+import logdir
+import uniquepath
+
+# bytes read from the source and written to the archive at a time
+CHUNK_SIZE = 65536
+
+
+def _to_bool(value):
+    if isinstance(value, basestring):
+        return value.strip().lower() not in ('', 'false', 'no', 'off', '0', 'none')
+    return bool(value)
+
+
+class _LogSource(object):
+    """Reads a log in chunks, skipping `skip` bytes, stopping after `limit`
+    bytes or keeping only the last `tail` bytes.
+    """
+
+    def __init__(self, stream, skip=0, limit=None, tail=None):
+        self._stream = stream
+        self._skip = skip
+        self._limit = limit
+        self._tail = tail
+
+    def chunks(self):
+        if self._tail:
+            return self._tail_chunks(self._range_chunks())
+        return self._range_chunks()
+
+    def _range_chunks(self):
+        skip = self._skip
+        remaining = self._limit
+        while remaining is None or remaining > 0:
+            size = CHUNK_SIZE
+            if remaining is not None and not skip:
+                size = min(size, remaining)
+            chunk = self._stream.read(size)
+            if not chunk:
+                break
+            if skip:
+                if len(chunk) <= skip:
+                    skip -= len(chunk)
+                    continue
+                chunk, skip = chunk[skip:], 0
+            if remaining is not None:
+                chunk = chunk[:remaining]
+                remaining -= len(chunk)
+            yield chunk
+
+    def _tail_chunks(self, chunks):
+        kept = deque()
+        kept_size = 0
+        for chunk in chunks:
+            kept.append(chunk)
+            kept_size += len(chunk)
+            while kept_size - len(kept[0]) >= self._tail:
+                kept_size -= len(kept.popleft())
+        if kept and kept_size > self._tail:
+            kept[0] = kept[0][kept_size - self._tail:]
+        return kept
+
+    def close(self):
+        self._stream.close()
+
+
+class RealtimeUtils(logdir.LogDirCache):
     """Some util functions specific to realtime
     """
 
     ROBOT_LIBRARY_SCOPE = 'TEST SUITE'
     ROBOT_LIBRARY_VERSION = get_version()
+
+    def __init__(self):
+        self.ROBOT_LIBRARY_LISTENER = self
     
     """Escape the string for ranorex
     """
@@ -25,12 +94,33 @@ class RealtimeUtils(object):
         new_string = string.replace("\'", "''")  
         return new_string
         
-    """Get the contents indentified by the url and embed it in the robot output
+    """Get the contents indentified by the url or local path and embed it in the robot output.
+    The contents are streamed into the archive in chunks, so logs of any size can be embedded.
+    Only part of the log is embedded when offset and size, or tail (last bytes), are given.
+    HTTP sources are asked for a byte range, other sources are skipped through.
+    With gzip_only the log is saved as a .log.gz file instead of a zip archive.
     """
-    def embed_log_file(self, url, name="realtime"):
-        response = urllib.urlopen(url)
-        content = response.read()
-        return embed_file(contents, name)
+    def embed_log_file(self, url, name="realtime", offset=0, size=None,
+                       tail=None, gzip_only=False):
+        offset = int(offset)
+        size = int(size) if size else None
+        tail = int(tail) if tail else None
+        if os.path.isfile(url) and not (offset or size or tail or
+                                        _to_bool(gzip_only)):
+            # whole local log is added to the archive as it is
+            path = self._save_datafile_file(name, url)
+            self._link_file(path)
+            return path
+        source = self._open_log_source(url, offset, size, tail)
+        try:
+            if _to_bool(gzip_only):
+                path = self._save_gzip_datafile(name, source.chunks())
+            else:
+                path = self._save_datafile_chunks(name, source.chunks())
+        finally:
+            source.close()
+        self._link_file(path)
+        return path
 
     """Takes the supplied contents, zips it and embeds it in robot output
     """
@@ -48,14 +138,65 @@ class RealtimeUtils(object):
             zf.close()
         return path
 
+    def _open_log_source(self, url, offset, size, tail):
+        if os.path.isfile(url):
+            stream = open(url, 'rb')
+            length = os.path.getsize(url)
+            start = max(0, length - tail) if tail else min(offset, length)
+            stream.seek(start)
+            length -= start
+            if size is not None:
+                length = min(length, size)
+            return _LogSource(stream, limit=length)
+        request = urllib2.Request(url)
+        if tail:
+            request.add_header('Range', 'bytes=-%d' % tail)
+        elif offset or size:
+            end = offset + size - 1 if size else ''
+            request.add_header('Range', 'bytes=%d-%s' % (offset, end))
+        response = urllib2.urlopen(request)
+        if response.getcode() == 206:
+            return _LogSource(response)
+        # range was not honored, the whole log is read and cut here
+        return _LogSource(response, skip=0 if tail else offset, limit=size,
+                          tail=tail)
+
+    def _save_datafile_chunks(self, name, chunks):
+        """Spools chunks to a temporary file which is added to the archive
+        with ZipFile.write, so the log is never held in memory whole.
+        """
+        fd, spool = tempfile.mkstemp(suffix='.log')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            return self._save_datafile_file(name, spool)
+        finally:
+            os.remove(spool)
+
+    def _save_datafile_file(self, name, source):
+        path = self._get_path(name, ".zip")
+        zf = zipfile.ZipFile(path, mode='w', compression=zipfile.ZIP_DEFLATED,
+                             allowZip64=True)
+        try:
+            zf.write(source, name + '.log')
+        finally:
+            zf.close()
+        return path
+
+    def _save_gzip_datafile(self, name, chunks):
+        path = self._get_path(name, ".log.gz")
+        gz = gzip.GzipFile(path, mode='wb')
+        try:
+            for chunk in chunks:
+                gz.write(chunk)
+        finally:
+            gz.close()
+        return path
+
     def _get_path(self, basename, ext=".log"):
         directory = self._norm_path(self._log_dir)
-        index = 0
-        while True:
-            index += 1
-            path = os.path.join(directory, "%s_%d%s" % (basename, index, ext))
-            if not os.path.exists(path):
-                return path
+        return uniquepath.allocate(directory, basename, ext)
 
     def _link_file(self, path):
         link = utils.get_link_path(path, self._log_dir)
@@ -66,12 +207,4 @@ class RealtimeUtils(object):
             return path
         return os.path.normpath(path.replace('/', os.sep))
 
-    @property
-    def _log_dir(self):
-        variables = BuiltIn().get_variables()
-        outdir = variables['${OUTPUTDIR}']
-        log = variables['${LOGFILE}']
-        log = os.path.dirname(log) if log != 'NONE' else '.'
-        return self._norm_path(os.path.join(outdir, log))
-
 
@@ -15,14 +15,20 @@
 import sys
 import os
 import base64
+import hashlib
+import shutil
+import threading
+from Queue import Queue
 if sys.platform.startswith('java'):
     from java.awt import Toolkit, Robot, Rectangle
-    from javax.imageio import ImageIO
+    from java.awt.image import BufferedImage
+    from javax.imageio import ImageIO, ImageWriteParam, IIOImage
     from java.io import File
 elif sys.platform == 'cli':
     import clr
     clr.AddReference('System.Windows.Forms')
     clr.AddReference('System.Drawing')
+    from System import Int64
     from System.Drawing import Bitmap, Graphics, Imaging
     from System.Windows.Forms import Screen
 else:
@@ -35,7 +41,7 @@ else:
     except ImportError:
         gdk = None
     try:
-        from PIL import ImageGrab  # apparently available only on Windows
+        from PIL import Image, ImageGrab  # on Linux requires Pillow and X11
     except ImportError:
         ImageGrab = None
 
@@ -44,8 +50,11 @@ from robot.api import logger
 from robot.libraries.BuiltIn import BuiltIn
 from robot.version import get_version
 
+import logdir
+import uniquepath
 
-class Screenshot(object):
+
+class Screenshot(logdir.LogDirCache):
     """Test library for taking screenshots on the machine where tests are run.
 
     Notice that successfully taking screenshots requires tests to be run with
@@ -65,7 +74,8 @@ class Screenshot(object):
     - PyGTK :: http://pygtk.org :: This module is available by default on most
       Linux distributions.
     - Python Imaging Library (PIL) :: http://www.pythonware.com/products/pil ::
-      This module can take screenshots only on Windows.
+      This module can take screenshots on Windows and, with Pillow, on Linux
+      using X11. It is the only one supporting WebP format.
 
     = Using with Jython and IronPython =
 
@@ -75,6 +85,27 @@ class Screenshot(object):
 
     IronPython support was added in Robot Framework 2.7.5.
 
+    = Writing screenshots in background =
+
+    Screenshots are captured when a keyword is called, but encoding and
+    writing them to disk is done by background writer threads and the log
+    links to the file right away. Writing is completed at the latest when
+    the suite ends. The number of writers is set with `writers` argument in
+    `importing`; `0` writes screenshots before the keyword returns.
+
+    = Region, scale and format =
+
+    `Take Screenshot` and `Take Screenshot Without Embedding` can capture
+    only a `region` of the screen given as `x,y,width,height`, downscale
+    the image by `scale` given as a factor (`0.5`) or a percentage (`50%`)
+    and save it in `format` `JPEG`, `PNG` or `WebP` with JPEG and WebP
+    `quality` between 1 and 100. If `format` is not given, it is taken from
+    the extension of the name and defaults to JPEG. A `format` not matching
+    the extension of the name is an error.
+
+    Running this module as a script with `bench` argument prints encode
+    time and file size of the supported formats, qualities and scales.
+
     = Where screenshots are saved =
 
     By default screenshots are saved into the same directory where the Robot
@@ -89,22 +120,55 @@ class Screenshot(object):
 
     ROBOT_LIBRARY_SCOPE = 'TEST SUITE'
     ROBOT_LIBRARY_VERSION = get_version()
+    REFERENCE_PREFIX = 'screenshot-ref:'
 
-    def __init__(self, screenshot_directory=None):
-        """Configure where screenshots are saved.
+    def __init__(self, screenshot_directory=None, writers=2, queue_size=8):
+        """Configure where screenshots are saved and how they are written.
 
         If `screenshot_directory` is not given, screenshots are saved into
         same directory as the log file. The directory can also be set using
         `Set Screenshot Directory` keyword.
 
+        `writers` is the number of background threads encoding and writing
+        screenshots and `queue_size` the number of captured screenshots
+        waiting to be written before taking a new one blocks. With wxPython
+        screenshots are always written in the foreground.
+
         Examples (use only one of these):
 
         | =Setting= |  =Value=   |  =Value=   |      =Value=       |
         | Library   | Screenshot |            | # Default location |
         | Library   | Screenshot | ${TEMPDIR} | # System temp      |
+        | Library   | Screenshot | writers=0  | # Write in foreground |
         """
         self._given_screenshot_dir = self._norm_path(screenshot_directory)
+        # content digest -> path of screenshot saved with a generated name
+        self._saved_screenshots = {}
+        self._dedup_statistics = {'hits': 0, 'misses': 0, 'saved': 0}
         self._screenshot_taker = ScreenshotTaker()
+        writers = int(writers)
+        if writers and self._screenshot_taker.module not in ('wx', 'no'):
+            self._writer = _ScreenshotWriter(self._screenshot_taker, writers,
+                                             int(queue_size))
+        else:
+            self._writer = None
+        self.ROBOT_LIBRARY_LISTENER = self
+
+    def _end_suite(self, name, attrs):
+        self._flush_screenshots(stop=True)
+        logdir.LogDirCache._end_suite(self, name, attrs)
+
+    def _close(self):
+        self._flush_screenshots(stop=True)
+
+    def _flush_screenshots(self, stop=False):
+        if not self._writer:
+            return
+        errors = self._writer.stop() if stop else self._writer.flush()
+        for error in errors:
+            logger.warn('Taking screenshot failed: %s\n'
+                        'Make sure tests are run with a physical or virtual display.'
+                        % error)
 
     def _norm_path(self, path):
         if not path:
@@ -115,14 +179,6 @@ class Screenshot(object):
     def _screenshot_dir(self):
         return self._given_screenshot_dir or self._log_dir
 
-    @property
-    def _log_dir(self):
-        variables = BuiltIn().get_variables()
-        outdir = variables['${OUTPUTDIR}']
-        log = variables['${LOGFILE}']
-        log = os.path.dirname(log) if log != 'NONE' else '.'
-        return self._norm_path(os.path.join(outdir, log))
-
     def set_screenshot_directory(self, path):
         """Sets the directory where screenshots are saved.
 
@@ -136,16 +192,18 @@ class Screenshot(object):
             raise RuntimeError("Directory '%s' does not exist." % path)
         old = self._screenshot_dir
         self._given_screenshot_dir = path
+        self._forget_log_dir()
         return old
 
-    def take_screenshot(self, name="screenshot", width="800px"):
-        """Takes a screenshot in JPEG format and embeds it into the log file.
+    def take_screenshot(self, name="screenshot", width="800px", region=None,
+                        scale=1, format=None, quality=None):
+        """Takes a screenshot and embeds it into the log file.
 
         Name of the file where the screenshot is stored is derived from the
-        given `name`. If the `name` ends with extension `.jpg` or `.jpeg`,
-        the screenshot will be stored with that exact name. Otherwise a unique
-        name is created by adding an underscore, a running index and
-        an extension to the `name`.
+        given `name`. If the `name` ends with extension `.jpg`, `.jpeg`,
+        `.png` or `.webp`, the screenshot will be stored with that exact name.
+        Otherwise a unique name is created by adding an underscore, a running
+        index and an extension matching the `format` to the `name`.
 
         The name will be interpreted to be relative to the directory where
         the log file is written. It is also possible to use absolute paths.
@@ -160,48 +218,182 @@ class Screenshot(object):
         | Take Screenshot | pic.jpg          |     | # LOGDIR/pic.jpg (always uses this file) |
         | Take Screenshot | images/login.jpg | 80% | # Specify both name and width. |
         | Take Screenshot | width=550px      |     | # Specify only width. |
+        | Take Screenshot | region=0,0,640,480 | scale=50% | format=PNG |
+
+        See `Region, scale and format` for `region`, `scale`, `format` and
+        `quality`.
 
         The path where the screenshot is saved is returned.
         """
-        path = self._save_screenshot(name)
+        path = self._save_screenshot(name, region=region, scale=scale,
+                                     format=format, quality=quality)
         self._embed_screenshot(path, width)
         return path
 
-    def take_screenshot_without_embedding(self, name="screenshot"):
+    def take_screenshot_without_embedding(self, name="screenshot", region=None,
+                                          scale=1, format=None, quality=None):
         """Takes a screenshot and links it from the log file.
 
         This keyword is otherwise identical to `Take Screenshot` but the saved
         screenshot is not embedded into the log file. The screenshot is linked
         so it is nevertheless easily available.
         """
-        path = self._save_screenshot(name)
+        path = self._save_screenshot(name, region=region, scale=scale,
+                                     format=format, quality=quality)
         self._link_screenshot(path)
         return path
 
     def embed_screenshot(self, base64image, name="screenshot", width="800px"):
-        """Takes a the supplied base64 encoded image in PNG format and embeds it into the log file.
+        """Takes a the supplied base64 encoded image and embeds it into the log file.
+
+        The image can be in PNG, JPEG or WebP format, the file is saved with
+        the matching extension.
+
+        If `name` does not give the exact file name and the same image was
+        already saved by this library instance, the existing file is
+        embedded instead of writing a new one. `base64image` can also be
+        a reference returned by the remote library in place of a screenshot
+        identical to its previous one. If the referenced image was not
+        saved here, it is fetched again with `Get Referenced Screenshot`
+        keyword of the remote library.
         """
         path = self._save_supplied_screenshot(base64image, name)
         self._embed_screenshot(path, width)
         return path
 
+    def get_screenshot_statistics(self):
+        """Returns how many embedded screenshots reused an already saved
+        file and how many bytes of files were not written because of it.
+
+        With background writers also the number of screenshots waiting to be
+        written, the highest such number and the number written are returned.
+        """
+        stats = dict(self._dedup_statistics)
+        if self._writer:
+            stats.update(self._writer.statistics())
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(float(stats['hits']) / total, 3) if total else 0.0
+        return stats
+
     def _save_supplied_screenshot(self, base64image, basename, directory=None):
-        path = self._get_screenshot_path(basename, directory, ".png")
+        if base64image.startswith(self.REFERENCE_PREFIX):
+            digest = base64image[len(self.REFERENCE_PREFIX):]
+        else:
+            digest = hashlib.sha1(base64image).hexdigest()
+        named = self._is_exact_name(basename)
+        saved = self._saved_screenshot(digest)
+        if saved and not named:
+            self._dedup_statistics['hits'] += 1
+            self._dedup_statistics['saved'] += os.path.getsize(saved)
+            return saved
+        self._dedup_statistics['misses'] += 1
+        if saved:
+            path = self._get_screenshot_path(basename, directory)
+            path = self._validate_screenshot_path(path)
+            if path != saved:
+                shutil.copyfile(saved, path)
+            return path
+        if base64image.startswith(self.REFERENCE_PREFIX):
+            base64image = BuiltIn().run_keyword('Get Referenced Screenshot',
+                                                base64image)
+        image = base64.b64decode(base64image)
+        path = self._get_screenshot_path(basename, directory,
+                                         self._image_extension(image))
         path = self._validate_screenshot_path(path)
         with open(path, 'wb') as f:
-            f.write(base64.b64decode(base64image))
+            f.write(image)
+        if not named:
+            self._saved_screenshots[digest] = path
         return path
 
-    def _save_screenshot(self, basename, directory=None):
-        path = self._get_screenshot_path(basename, directory)
-        return self._screenshot_to_file(path)
+    def _image_extension(self, image):
+        if image.startswith('\xff\xd8'):
+            return '.jpg'
+        if image.startswith('RIFF') and image[8:12] == 'WEBP':
+            return '.webp'
+        return '.png'
+
+    def _saved_screenshot(self, digest):
+        path = self._saved_screenshots.get(digest)
+        if not path or not os.path.exists(path):
+            return None
+        return path
 
-    def _screenshot_to_file(self, path):
+    def _save_screenshot(self, basename, directory=None, region=None,
+                         scale=1, format=None, quality=None):
+        format = self._parse_format(format, basename)
+        options = {'format': format, 'scale': self._parse_scale(scale),
+                   'quality': self._parse_quality(quality)}
+        path = self._get_screenshot_path(basename, directory,
+                                         ScreenshotTaker.EXTENSIONS[format])
+        return self._screenshot_to_file(path, self._parse_region(region),
+                                        options)
+
+    def _parse_format(self, format, basename):
+        ext = os.path.splitext(basename)[1].lower()
+        named = {'.jpg': 'jpeg', '.jpeg': 'jpeg', '.png': 'png',
+                 '.webp': 'webp'}.get(ext)
+        format = (format or named or 'jpeg').lower()
+        format = 'jpeg' if format == 'jpg' else format
+        if format not in ScreenshotTaker.EXTENSIONS:
+            raise RuntimeError("Format '%s' is not supported, use JPEG, PNG "
+                               "or WebP." % format)
+        if named and format != named:
+            raise RuntimeError("Format '%s' does not match extension of "
+                               "name '%s'." % (format, basename))
+        if self._screenshot_taker and not self._screenshot_taker.supports(format):
+            raise RuntimeError("Format '%s' is not supported with %s modules."
+                               % (format, self._screenshot_taker.module))
+        return format
+
+    def _parse_scale(self, scale):
+        given = str(scale).strip()
+        try:
+            if given.endswith('%'):
+                scale = float(given[:-1]) / 100
+            else:
+                scale = float(given)
+        except ValueError:
+            scale = 0
+        if scale <= 0:
+            raise RuntimeError("Scale must be a positive factor or percentage, "
+                               "got '%s'." % given)
+        return scale
+
+    def _parse_quality(self, quality):
+        if quality in (None, '', 'None'):
+            return None
+        quality = int(quality)
+        if not 1 <= quality <= 100:
+            raise RuntimeError("Quality must be between 1 and 100, got %d."
+                               % quality)
+        return quality
+
+    def _parse_region(self, region):
+        if not region:
+            return None
+        if isinstance(region, basestring):
+            region = region.split(',')
+        try:
+            x, y, width, height = [int(str(item).strip()) for item in region]
+        except ValueError:
+            raise RuntimeError("Region must be given as 'x,y,width,height', "
+                               "got '%s'." % (region,))
+        if width <= 0 or height <= 0:
+            raise RuntimeError("Region width and height must be positive.")
+        return x, y, width, height
+
+    def _screenshot_to_file(self, path, region=None, options=None):
         path = self._validate_screenshot_path(path)
+        options = options or {}
         logger.debug('Using %s modules for taking screenshot.'
                      % self._screenshot_taker.module)
         try:
-            self._screenshot_taker(path)
+            if self._writer:
+                self._writer.submit(self._screenshot_taker.capture(region),
+                                    path, options)
+            else:
+                self._screenshot_taker(path, region, **options)
         except:
             logger.warn('Taking screenshot failed: %s\n'
                         'Make sure tests are run with a physical or virtual display.'
@@ -217,14 +409,12 @@ class Screenshot(object):
 
     def _get_screenshot_path(self, basename, directory, ext=".jpg"):
         directory = self._norm_path(directory) if directory else self._screenshot_dir
-        if basename.lower().endswith(('.jpg', '.jpeg', '.png')):
+        if self._is_exact_name(basename):
             return os.path.join(directory, basename)
-        index = 0
-        while True:
-            index += 1
-            path = os.path.join(directory, "%s_%d%s" % (basename, index, ext))
-            if not os.path.exists(path):
-                return path
+        return uniquepath.allocate(directory, basename, ext)
+
+    def _is_exact_name(self, basename):
+        return basename.lower().endswith(('.jpg', '.jpeg', '.png', '.webp'))
 
     def _embed_screenshot(self, path, width):
         link = utils.get_link_path(path, self._log_dir)
@@ -237,15 +427,105 @@ class Screenshot(object):
                     % (link, path), html=True)
 
 
+class _ScreenshotWriter(object):
+    """Encodes and saves captured screenshots in background threads.
+
+    Errors cannot be logged from the writer threads, so they are collected
+    and returned by `flush` and `stop`. Threads are started with the first
+    screenshot and stopped by `stop` when the suite ends.
+    """
+
+    def __init__(self, taker, workers, queue_size):
+        self._taker = taker
+        self._queue = Queue(queue_size)
+        self._workers = workers
+        self._threads = []
+        self._lock = threading.Lock()
+        self._errors = []
+        self.max_pending = 0
+        self.written = 0
+
+    def submit(self, image, path, options):
+        if not self._threads:
+            self._start()
+        self._queue.put((image, path, options))
+        self.max_pending = max(self.max_pending, self._queue.qsize())
+
+    def _start(self):
+        for _ in range(self._workers):
+            worker = threading.Thread(target=self._work)
+            worker.daemon = True
+            worker.start()
+            self._threads.append(worker)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            image, path, options = item
+            try:
+                self._taker.save(image, path, **options)
+                with self._lock:
+                    self.written += 1
+            except:
+                with self._lock:
+                    self._errors.append(utils.get_error_message())
+            self._queue.task_done()
+
+    def flush(self):
+        """Waits until all screenshots are written, returns errors."""
+        self._queue.join()
+        with self._lock:
+            errors, self._errors = self._errors, []
+        return errors
+
+    def stop(self):
+        """Writes pending screenshots and stops the threads, returns errors.
+        Threads are started again if more screenshots are submitted."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for worker in self._threads:
+            worker.join()
+        self._threads = []
+        return self.flush()
+
+    def statistics(self):
+        with self._lock:
+            written = self.written
+        return {'pending': self._queue.qsize(),
+                'max_pending': self.max_pending, 'written': written}
+
+
 class ScreenshotTaker(object):
+    FORMATS = {'java': ('jpeg', 'png'), 'cli': ('jpeg', 'png'),
+               'wx': ('jpeg', 'png'), 'gtk': ('jpeg', 'png'),
+               'pil': ('jpeg', 'png', 'webp'), 'no': ()}
+    EXTENSIONS = {'jpeg': '.jpg', 'png': '.png', 'webp': '.webp'}
 
     def __init__(self, module_name=None):
-        self._screenshot = self._get_screenshot_taker(module_name)
-        self.module = self._screenshot.__name__.split('_')[1]
+        self.module = self._get_module(module_name)
+        self._capture = getattr(self, '_%s_capture' % self.module)
+        self._save = getattr(self, '_%s_save' % self.module)
         self._wx_app_reference = None
 
-    def __call__(self, path):
-        self._screenshot(path)
+    def __call__(self, path, region=None, format='jpeg', quality=None, scale=1):
+        self.save(self.capture(region), path, format, quality, scale)
+
+    def capture(self, region=None):
+        """Captures the screen, or `(x, y, width, height)` region of it, and
+        returns the image in a form `save` accepts. Can be called from any
+        thread."""
+        return self._capture(region)
+
+    def save(self, image, path, format='jpeg', quality=None, scale=1):
+        """Downscales the image by `scale` and saves it in `format`.
+        `quality` is used with JPEG and WebP, backend default when `None`."""
+        self._save(image, path, format, quality, scale)
+
+    def supports(self, format):
+        return format in self.FORMATS[self.module]
 
     def __nonzero__(self):
         return self.module != 'no'
@@ -267,78 +547,203 @@ class ScreenshotTaker(object):
             print "Success!"
             return True
 
-    def _get_screenshot_taker(self, module_name):
+    def bench(self, directory, rounds=3):
+        """Prints encode time and file size of each supported format,
+        quality and scale for one captured screenshot."""
+        import time
+        print "Using '%s' module." % self.module
+        if not self:
+            return False
+        print '%-6s %7s %6s %10s %10s' % ('format', 'quality', 'scale',
+                                          'ms', 'bytes')
+        for format in self.FORMATS[self.module]:
+            qualities = (None,) if format == 'png' else (None, 90, 75, 50)
+            for quality in qualities:
+                for scale in (1, 0.75, 0.5):
+                    path = os.path.join(directory, 'bench%s'
+                                        % self.EXTENSIONS[format])
+                    elapsed = 0
+                    for _ in range(rounds):
+                        image = self.capture()
+                        start = time.time()
+                        self.save(image, path, format, quality, scale)
+                        elapsed += time.time() - start
+                    print '%-6s %7s %6s %10.1f %10d' % (
+                        format, quality or 'default', scale,
+                        elapsed * 1000 / rounds, os.path.getsize(path))
+                    os.remove(path)
+        return True
+
+    def _get_module(self, module_name):
         if sys.platform.startswith('java'):
-            return self._java_screenshot
+            return 'java'
         if sys.platform == 'cli':
-            return self._cli_screenshot
+            return 'cli'
         if module_name:
-            method_name = '_%s_screenshot' % module_name.lower()
-            if hasattr(self, method_name):
-                return getattr(self, method_name)
-        return self._get_default_screenshot_taker()
-
-    def _get_default_screenshot_taker(self):
-        for module, screenshot_taker in [(wx, self._wx_screenshot),
-                                         (gdk, self._gtk_screenshot),
-                                         (ImageGrab, self._pil_screenshot),
-                                         (True, self._no_screenshot)]:
+            module_name = module_name.lower()
+            if hasattr(self, '_%s_capture' % module_name):
+                return module_name
+        return self._get_default_module()
+
+    def _get_default_module(self):
+        for module, name in [(wx, 'wx'), (gdk, 'gtk'), (ImageGrab, 'pil'),
+                             (True, 'no')]:
             if module:
-                return screenshot_taker
-
-    def _java_screenshot(self, path):
-        size = Toolkit.getDefaultToolkit().getScreenSize()
-        rectangle = Rectangle(0, 0, size.width, size.height)
-        image = Robot().createScreenCapture(rectangle)
-        ImageIO.write(image, 'jpg', File(path))
-
-    def _cli_screenshot(self, path):
-        bmp = Bitmap(Screen.PrimaryScreen.Bounds.Width,
-                     Screen.PrimaryScreen.Bounds.Height)
+                return name
+
+    def _scaled_size(self, width, height, scale):
+        return (max(1, int(round(width * scale))),
+                max(1, int(round(height * scale))))
+
+    def _java_capture(self, region):
+        if not region:
+            size = Toolkit.getDefaultToolkit().getScreenSize()
+            region = (0, 0, size.width, size.height)
+        return Robot().createScreenCapture(Rectangle(*region))
+
+    def _java_save(self, image, path, format, quality, scale):
+        if scale != 1:
+            width, height = self._scaled_size(image.getWidth(),
+                                              image.getHeight(), scale)
+            scaled = BufferedImage(width, height, BufferedImage.TYPE_INT_RGB)
+            graphics = scaled.createGraphics()
+            graphics.drawImage(image, 0, 0, width, height, None)
+            graphics.dispose()
+            image = scaled
+        writer = ImageIO.getImageWritersByFormatName(format).next()
+        param = writer.getDefaultWriteParam()
+        if quality and format == 'jpeg':
+            param.setCompressionMode(ImageWriteParam.MODE_EXPLICIT)
+            param.setCompressionQuality(quality / 100.0)
+        output = ImageIO.createImageOutputStream(File(path))
+        try:
+            writer.setOutput(output)
+            writer.write(None, IIOImage(image, None, None), param)
+        finally:
+            output.close()
+            writer.dispose()
+
+    def _cli_capture(self, region):
+        if not region:
+            bounds = Screen.PrimaryScreen.Bounds
+            region = (bounds.X, bounds.Y, bounds.Width, bounds.Height)
+        x, y, width, height = region
+        bmp = Bitmap(width, height)
         graphics = Graphics.FromImage(bmp)
         try:
-            graphics.CopyFromScreen(0, 0, 0, 0, bmp.Size)
+            graphics.CopyFromScreen(x, y, 0, 0, bmp.Size)
         finally:
             graphics.Dispose()
-            bmp.Save(path, Imaging.ImageFormat.Jpeg)
+        return bmp
+
+    def _cli_save(self, bmp, path, format, quality, scale):
+        try:
+            if scale != 1:
+                width, height = self._scaled_size(bmp.Width, bmp.Height, scale)
+                scaled = Bitmap(bmp, width, height)
+                bmp.Dispose()
+                bmp = scaled
+            if format == 'png':
+                bmp.Save(path, Imaging.ImageFormat.Png)
+            elif not quality:
+                bmp.Save(path, Imaging.ImageFormat.Jpeg)
+            else:
+                codec = [codec for codec in Imaging.ImageCodecInfo.GetImageEncoders()
+                         if codec.FormatID == Imaging.ImageFormat.Jpeg.Guid][0]
+                params = Imaging.EncoderParameters(1)
+                params.Param[0] = Imaging.EncoderParameter(Imaging.Encoder.Quality,
+                                                           Int64(quality))
+                bmp.Save(path, codec, params)
+        finally:
+            bmp.Dispose()
 
-    def _wx_screenshot(self, path):
+    def _wx_capture(self, region):
         if not self._wx_app_reference:
             self._wx_app_reference = wx.PySimpleApp()
         context = wx.ScreenDC()
-        width, height = context.GetSize()
+        if region:
+            x, y, width, height = region
+        else:
+            x, y = -1, -1
+            width, height = context.GetSize()
         bitmap = wx.EmptyBitmap(width, height, -1)
         memory = wx.MemoryDC()
         memory.SelectObject(bitmap)
-        memory.Blit(0, 0, width, height, context, -1, -1)
+        memory.Blit(0, 0, width, height, context, x, y)
         memory.SelectObject(wx.NullBitmap)
-        bitmap.SaveFile(path, wx.BITMAP_TYPE_JPEG)
-
-    def _gtk_screenshot(self, path):
+        return bitmap
+
+    def _wx_save(self, bitmap, path, format, quality, scale):
+        if scale == 1 and not quality:
+            bitmap.SaveFile(path, self._wx_type(format))
+            return
+        image = bitmap.ConvertToImage()
+        if scale != 1:
+            width, height = self._scaled_size(image.GetWidth(),
+                                              image.GetHeight(), scale)
+            image = image.Scale(width, height, wx.IMAGE_QUALITY_HIGH)
+        if quality:
+            image.SetOption('quality', str(quality))
+        image.SaveFile(path, self._wx_type(format))
+
+    def _wx_type(self, format):
+        return wx.BITMAP_TYPE_PNG if format == 'png' else wx.BITMAP_TYPE_JPEG
+
+    def _gtk_capture(self, region):
         window = gdk.get_default_root_window()
         if not window:
             raise RuntimeError('Taking screenshot failed')
-        width, height = window.get_size()
+        if region:
+            x, y, width, height = region
+        else:
+            x, y = 0, 0
+            width, height = window.get_size()
         pb = gdk.Pixbuf(gdk.COLORSPACE_RGB, False, 8, width, height)
         pb = pb.get_from_drawable(window, window.get_colormap(),
-                                  0, 0, 0, 0, width, height)
+                                  x, y, 0, 0, width, height)
         if not pb:
             raise RuntimeError('Taking screenshot failed')
-        pb.save(path, 'jpeg')
-
-    def _pil_screenshot(self, path):
-        ImageGrab.grab().save(path, 'JPEG')
-
-    def _no_screenshot(self, path):
+        return pb
+
+    def _gtk_save(self, pb, path, format, quality, scale):
+        if scale != 1:
+            width, height = self._scaled_size(pb.get_width(), pb.get_height(),
+                                              scale)
+            pb = pb.scale_simple(width, height, gdk.INTERP_BILINEAR)
+        options = {'quality': str(quality)} if quality and format == 'jpeg' else {}
+        pb.save(path, format, options)
+
+    def _pil_capture(self, region):
+        if not region:
+            return ImageGrab.grab()
+        x, y, width, height = region
+        return ImageGrab.grab((x, y, x + width, y + height))
+
+    def _pil_save(self, image, path, format, quality, scale):
+        if scale != 1:
+            image = image.resize(self._scaled_size(image.size[0], image.size[1],
+                                                   scale), Image.BILINEAR)
+        if format == 'jpeg' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        options = {'quality': quality} if quality and format != 'png' else {}
+        image.save(path, format.upper(), **options)
+
+    def _no_capture(self, region):
         raise RuntimeError('Taking screenshots is not supported on this platform '
                            'by default. See library documentation for details.')
 
+    def _no_save(self, image, path, format, quality, scale):
+        self._no_capture(None)
+
 
 if __name__ == "__main__":
     if len(sys.argv) not in [2, 3]:
-        sys.exit("Usage: %s <path> [wx|gtk|pil] OR test [<path>]" % os.path.basename(sys.argv[0]))
+        sys.exit("Usage: %s <path> [wx|gtk|pil] OR test [<path>] OR bench [<dir>]" % os.path.basename(sys.argv[0]))
     if sys.argv[1] == 'test':
         sys.exit(0 if ScreenshotTaker().test(*sys.argv[2:]) else 1)
+    if sys.argv[1] == 'bench':
+        directory = sys.argv[2] if len(sys.argv) == 3 else '.'
+        sys.exit(0 if ScreenshotTaker().bench(directory) else 1)
     path = utils.abspath(sys.argv[1])
     module = sys.argv[2] if len(sys.argv) == 3 else None
     shooter = ScreenshotTaker(module)
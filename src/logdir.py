@@ -0,0 +1,38 @@
+"""Directory of the log file for libraries saving files next to it.
+
+The directory is resolved once per suite and forgotten when a suite starts
+or ends, because each suite can have its own log and output directory.
+"""
+import os
+
+from robot.libraries.BuiltIn import BuiltIn
+
+
+class LogDirCache(object):
+    """Mixin for libraries which act as their own listener with
+    ``self.ROBOT_LIBRARY_LISTENER = self``. Libraries overriding the
+    listener methods must call these too.
+    """
+
+    ROBOT_LISTENER_API_VERSION = 2
+    _resolved_log_dir = None
+
+    def _start_suite(self, name, attrs):
+        self._forget_log_dir()
+
+    def _end_suite(self, name, attrs):
+        self._forget_log_dir()
+
+    def _forget_log_dir(self):
+        self._resolved_log_dir = None
+
+    @property
+    def _log_dir(self):
+        if self._resolved_log_dir is None:
+            builtin = BuiltIn()
+            outdir = builtin.get_variable_value('${OUTPUTDIR}')
+            log = builtin.get_variable_value('${LOGFILE}')
+            log = os.path.dirname(log) if log != 'NONE' else '.'
+            path = os.path.join(outdir, log).replace('/', os.sep)
+            self._resolved_log_dir = os.path.normpath(path)
+        return self._resolved_log_dir
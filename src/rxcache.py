@@ -0,0 +1,67 @@
+"""
+    Element handle cache used by the remote ranorex library.
+    Found adapters are reused between keywords on the same locator
+    while they are fresh and still valid.
+"""
+import time
+
+
+class ElementCache(object):
+    """ Opt-in cache of found ranorex adapters keyed by locator.
+    Entries expire after ttl seconds and are checked with a validity
+    probe before reuse, so closed windows are never handed out.
+    """
+    def __init__(self, enabled=False, ttl=5.0, validate=True, clock=time.time):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.validate = validate
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clock = clock
+        self._entries = {}
+
+    def find(self, adapter, locator):
+        """ Returns adapter for locator, searching with adapter(locator)
+        only when there is no usable cached one
+        """
+        if not self.enabled:
+            return adapter(locator)
+        obj = self.get(locator)
+        if obj is None or not isinstance(obj, adapter):
+            obj = adapter(locator)
+            self.put(locator, obj)
+        return obj
+
+    def get(self, locator):
+        entry = self._entries.get(locator)
+        if entry is None:
+            self.misses += 1
+            return None
+        obj, stored = entry
+        if self._clock() - stored > self.ttl or \
+                (self.validate and not self._is_valid(obj)):
+            del self._entries[locator]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return obj
+
+    def put(self, locator, obj):
+        self._entries[locator] = (obj, self._clock())
+
+    def clear(self):
+        self._entries.clear()
+
+    @staticmethod
+    def _is_valid(obj):
+        try:
+            return bool(obj.Element.Valid)
+        except Exception:
+            return False
+
+    def statistics(self):
+        return {'enabled': self.enabled, 'ttl': self.ttl,
+                'size': len(self._entries), 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
@@ -7,18 +7,538 @@ import clr
 clr.AddReference('Ranorex.Core')
 clr.AddReference('System.Windows.Forms')
 import System.Windows.Forms
+import System.Threading
 import Ranorex
 #python imports
 from System.Collections.Generic import List
+from System.Diagnostics import Stopwatch
 from argparse import ArgumentParser
-from robotremoteserver import RobotRemoteServer
+from robotremoteserver import RobotRemoteServer, concurrency, PARALLEL, Blob, FileBlob
 from os.path import expanduser
+from collections import deque
 import subprocess
 import logging
+import inspect
+import hashlib
+import json
+import threading
+import random
+import rxcache
+import rxpath
+import rxprocess
+import rxtable
+import rxtrace
+import rxtree
 import time
 import sys
 import os
 
+SUPPORTED_TYPES = ['AbbrTag', 'AcronymTag', 'AddressTag', 'AreaTag',
+                   'ArticleTag', 'AsideTag', 'ATag', 'AudioTag',
+                   'BaseFontTag', 'BaseTag', 'BdoTag', 'BigTag',
+                   'BodyTag', 'BrTag', 'BTag', 'Button',
+                   'ButtonTag', 'CanvasTag', 'Cell', 'CenterTag',
+                   'CheckBox', 'CiteTag', 'CodeTag', 'ColGroupTag',
+                   'ColTag', 'Column', 'ComboBox', 'CommandTag',
+                   'Container', 'ContextMenu', 'DataListTag', 'DateTime',
+                   'DdTag', 'DelTag', 'DetailsTag', 'DfnTag',
+                   'DirTag', 'DivTag', 'DlTag', 'EmbedTag', 'EmTag',
+                   'FieldSetTag', 'FigureTag', 'FontTag', 'Form', 'FormTag',
+                   'Link', 'List', 'ListItem', 'MenuBar',
+                   'MenuItem', 'Picture', 'ProgressBar',
+                   'RadioButton', 'Row', 'ScrollBar', 'Slider',
+                   'StatusBar', 'Table', 'TabPage', 'Text', 'TitleBar',
+                   'ToggleButton', 'Tree', 'TreeItem', 'Unknown' ]
+
+
+class _AdapterTypeTable(object):
+    """ Case insensitive index of supported ranorex adapter names
+    """
+    def __init__(self, names):
+        self._index = dict((name.lower(), name) for name in names)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, element):
+        name = self._index.get(element.lower())
+        if name is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return name
+
+    def statistics(self):
+        return {'size': len(self._index), 'hits': self.hits,
+                'misses': self.misses}
+
+
+_TICKS_PER_SECOND = float(Stopwatch.Frequency)
+
+
+def _clock():
+    """ Monotonic clock in seconds """
+    return Stopwatch.GetTimestamp() / _TICKS_PER_SECOND
+
+
+class _Poller(object):
+    """ Polls a condition until it holds or the deadline passes.
+    Starts with a short interval which grows exponentially up to a cap,
+    with some jitter. The last check is done exactly at the deadline.
+    Statistics are shared by keywords running in parallel.
+    """
+    def __init__(self, first_interval=0.05, max_interval=1.0, factor=2.0,
+                 jitter=0.1, history=50):
+        self.first_interval = first_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+        self._stats = {}
+        self._history = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def poll(self, name, condition, timeout):
+        """ Returns True once condition() is true, False when timeout
+        (in seconds) passed without it.
+        """
+        start = _clock()
+        deadline = start + timeout
+        interval = self.first_interval
+        iterations = 0
+        lost = 0.0
+        while True:
+            iterations += 1
+            if condition():
+                self._record(name, True, iterations, _clock() - start, lost)
+                return True
+            remaining = deadline - _clock()
+            if remaining <= 0:
+                self._record(name, False, iterations, _clock() - start, 0.0)
+                return False
+            jitter = random.uniform(1 - self.jitter, 1 + self.jitter)
+            lost = min(interval * jitter, remaining)
+            time.sleep(lost)
+            interval = min(interval * self.factor, self.max_interval)
+
+    def _record(self, name, success, iterations, elapsed, lost):
+        """ lost is the last sleep before success, the most the wait
+        could have taken longer than ideal.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(name, {'waits': 0, 'successes': 0,
+                                                  'iterations': 0,
+                                                  'elapsed': 0.0, 'lost': 0.0})
+            stats['waits'] += 1
+            stats['successes'] += int(success)
+            stats['iterations'] += iterations
+            stats['elapsed'] += elapsed
+            stats['lost'] += lost
+            self._history.append({'name': name, 'success': success,
+                                  'iterations': iterations,
+                                  'elapsed': round(elapsed, 3),
+                                  'lost': round(lost, 3)})
+
+    def statistics(self):
+        with self._lock:
+            totals = dict((name, dict(stats))
+                          for name, stats in self._stats.items())
+            return {'totals': totals, 'last': list(self._history)}
+
+
+_PROCESSES = rxprocess.ProcessInventory(clock=_clock)
+
+
+_TRACER = rxtrace.Tracer(clock=_clock)
+_traced = rxtrace.traced(_TRACER)
+
+
+class _Settler(object):
+    """ Decides how keywords wait for the UI to settle after acting on it.
+
+    Modes:
+    - fixed: sleep for the keyword's delay (the old behaviour)
+    - none: do not wait at all
+    - condition: poll the element until one of its attributes or its focus
+      changes, or until it stays unchanged (UI idle). The keyword's delay
+      is the upper bound of the wait. Keywords without a target element
+      (drag, send keys) fall back to the fixed delay.
+    """
+    MODES = ('fixed', 'none', 'condition')
+    ATTRIBUTES = ('Text', 'Checked', 'Enabled', 'Visible')
+    IDLE_POLLS = 3
+    FIRST_INTERVAL = 0.01
+    MAX_INTERVAL = 0.2
+
+    def __init__(self, mode='fixed', timeout=None):
+        self.mode = mode
+        self.timeout = timeout
+        self.overrides = {}
+        self.calls = 0
+        self.waited = 0.0
+        self.saved = 0.0
+
+    def policy(self, keyword, default):
+        mode, timeout = self.overrides.get(keyword, (self.mode, self.timeout))
+        return mode, default if timeout is None else timeout
+
+    def snapshot(self, keyword, obj):
+        """ Reads element state before the action if keyword settles
+        on condition.
+        """
+        if obj is None or self.policy(keyword, 0)[0] != 'condition':
+            return None
+        return self._read_state(obj)
+
+    def settle(self, keyword, default, obj=None, before=None):
+        mode, timeout = self.policy(keyword, default)
+        start = _clock()
+        with _TRACER.span('settle'):
+            if mode == 'condition' and obj is not None:
+                self._wait_for_change(obj, before, timeout)
+            elif mode != 'none':
+                Ranorex.Delay.Milliseconds(int(timeout * 1000))
+        waited = _clock() - start
+        self.calls += 1
+        self.waited += waited
+        self.saved += max(default - waited, 0)
+
+    def _wait_for_change(self, obj, before, timeout):
+        deadline = _clock() + timeout
+        interval = self.FIRST_INTERVAL
+        previous = before
+        changed = False
+        unchanged = 0
+        while True:
+            state = self._read_state(obj)
+            if state != previous:
+                changed = changed or state != before
+                unchanged = 0
+            else:
+                unchanged += 1
+                if changed or unchanged >= self.IDLE_POLLS:
+                    return
+            previous = state
+            remaining = deadline - _clock()
+            if remaining <= 0:
+                return
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, self.MAX_INTERVAL)
+
+    def _read_state(self, obj):
+        try:
+            element = obj.Element
+            state = [element.GetAttributeValue(name) for name in self.ATTRIBUTES]
+            state.append(obj.HasFocus)
+            return tuple(state)
+        except Exception:
+            # element is gone, e.g. its window was closed by the action
+            return None
+
+    def statistics(self):
+        return {'mode': self.mode, 'overrides': dict(self.overrides),
+                'calls': self.calls, 'waited': round(self.waited, 3),
+                'saved': round(self.saved, 3)}
+
+
+class _ScreenshotDeduplicator(object):
+    """ Replaces screenshot identical to the previous one of the same
+    element with a reference to it, which the Screenshot library resolves
+    to the already saved file. Digests of the last screenshot of up to
+    1024 elements are kept, and only the 8 most recently used images, so
+    older references cannot be resolved to the image again.
+    """
+    PREFIX = 'screenshot-ref:'
+
+    def __init__(self, elements=1024, images=8):
+        self.enabled = False
+        self.hits = 0
+        self.misses = 0
+        self.saved = 0
+        self._last = rxpath.LRUCache(elements)
+        self._images = rxpath.LRUCache(images)
+
+    def process(self, key, image):
+        if not self.enabled:
+            return image
+        digest = hashlib.sha1(image.encode('ascii')).hexdigest()
+        self._images.put(digest, image)
+        if self._last.get(key) == digest:
+            self.hits += 1
+            self.saved += len(image)
+            return self.PREFIX + digest
+        self._last.put(key, digest)
+        self.misses += 1
+        return image
+
+    def resolve(self, reference):
+        """ Returns image the reference stands for, None if not known
+        """
+        return self._images.get(reference[len(self.PREFIX):])
+
+    def reset(self):
+        self._last.clear()
+        self._images.clear()
+
+    def statistics(self):
+        total = self.hits + self.misses
+        return {'enabled': self.enabled, 'hits': self.hits,
+                'misses': self.misses, 'saved': self.saved,
+                'hit_rate': round(float(self.hits) / total, 3) if total else 0.0}
+
+
+def _escape_keys(text):
+    """ Escapes braces so text is typed as it is by PressKeys
+    """
+    return ''.join('{%s}' % char if char in '{}' else char for char in text)
+
+
+class _Selector(object):
+    """ Selects item of combobox or list by index trying the cheapest
+    strategy first and verifying the selected index with one read after
+    each strategy. When the index cannot be read the Selected state of
+    the item is checked, a selection which cannot be verified at all
+    counts as failed.
+    """
+    def __init__(self):
+        self.used = {'attribute': 0, 'item': 0, 'typeahead': 0, 'keys': 0}
+        self.failures = 0
+
+    def select(self, obj, index, text=None):
+        """ Selects item at index, text of the item enables type-ahead.
+        Returns name of the strategy which selected the item.
+        """
+        strategies = [('attribute', self._by_attribute),
+                      ('item', self._by_item)]
+        if text:
+            strategies.append(('typeahead', self._by_typeahead))
+        strategies.append(('keys', self._by_keys))
+        for name, strategy in strategies:
+            try:
+                strategy(obj, index, text)
+            except Exception:
+                continue
+            if self._is_selected(obj, index):
+                self.used[name] += 1
+                return name
+        self.failures += 1
+        raise AssertionError("Selecting item %d failed, selected item is %s"
+                             % (index, self.selected_index(obj)))
+
+    def selected_index(self, obj):
+        selected = obj.Element.GetAttributeValue("SelectedItemIndex")
+        return None if selected is None else int(selected)
+
+    def _is_selected(self, obj, index):
+        selected = self.selected_index(obj)
+        if selected is not None:
+            return selected == index
+        try:
+            state = obj.Items[index].Element.GetAttributeValue("Selected")
+        except Exception:
+            return False
+        return unicode(state).lower() == 'true'
+
+    def index_of(self, obj, attribute, expected):
+        """ Returns index of the first item whose attribute is expected
+        """
+        for index, item in enumerate(obj.Items):
+            if unicode(item.Element.GetAttributeValue(attribute)) == expected:
+                return index
+        raise AssertionError("No item with %s '%s'" % (attribute, expected))
+
+    def _by_attribute(self, obj, index, text):
+        obj.Element.SetAttributeValue("SelectedItemIndex", index)
+
+    def _by_item(self, obj, index, text):
+        obj.Items[index].Select()
+
+    def _by_typeahead(self, obj, index, text):
+        obj.PressKeys(_escape_keys(text))
+
+    def _by_keys(self, obj, index, text):
+        """ Sends the shortest of moving from current item, from the
+        first item or from the last item as one key sequence.
+        """
+        paths = [(index, '{home}', '{down}')]
+        current = self.selected_index(obj)
+        if current is not None and current >= 0:
+            if index >= current:
+                paths.append((index - current, '', '{down}'))
+            else:
+                paths.append((current - index, '', '{up}'))
+        try:
+            count = len(obj.Items)
+        except Exception:
+            count = None
+        if count:
+            paths.append((count - 1 - index, '{end}', '{up}'))
+        steps, start, key = min(paths)
+        obj.PressKeys(start + key * steps)
+
+    def statistics(self):
+        stats = dict(self.used)
+        stats['failures'] = self.failures
+        return stats
+
+
+class _TextEntry(object):
+    """ Replaces text of element using the fastest strategy allowed by
+    mode and verifies the result with one read of the Text attribute.
+    Text which cannot be read counts as not set.
+    """
+    MODES = {'auto': ('value', 'paste', 'keys'), 'value': ('value',),
+             'paste': ('paste',), 'keys': ('keys',)}
+
+    def __init__(self):
+        self.used = {'value': 0, 'paste': 0, 'keys': 0}
+        self.failures = 0
+
+    def strategies(self, mode):
+        try:
+            return self.MODES[mode.lower()]
+        except KeyError:
+            raise AssertionError("Unknown text mode '%s', use one of %s"
+                                 % (mode, ', '.join(sorted(self.MODES))))
+
+    def current(self, obj):
+        text = obj.Element.GetAttributeValue("Text")
+        return None if text is None else unicode(text)
+
+    def replace(self, obj, text, mode='auto', key_press_time=None):
+        """ Returns name of the strategy which set the text
+        """
+        for name in self.strategies(mode):
+            try:
+                if name == 'keys':
+                    self.type_keys(obj, "{LControlKey down}{Akey}{LControlKey up}"
+                                   "{Delete}" + _escape_keys(text), key_press_time)
+                else:
+                    getattr(self, '_by_' + name)(obj, text)
+            except Exception:
+                continue
+            found = self.current(obj)
+            if found is not None and \
+                    self._normalize(found) == self._normalize(text):
+                self.used[name] += 1
+                return name
+        self.failures += 1
+        raise AssertionError("Setting text failed, element has text '%s'"
+                             % self.current(obj))
+
+    def type_keys(self, obj, keys, key_press_time=None):
+        if key_press_time is None:
+            obj.PressKeys(keys)
+            return
+        default = Ranorex.Keyboard.DefaultKeyPressTime
+        Ranorex.Keyboard.DefaultKeyPressTime = int(key_press_time)
+        try:
+            obj.PressKeys(keys)
+        finally:
+            Ranorex.Keyboard.DefaultKeyPressTime = default
+
+    def _by_value(self, obj, text):
+        obj.Element.SetAttributeValue("Text", text)
+
+    def _by_paste(self, obj, text):
+        if not text:
+            obj.PressKeys("{LControlKey down}{Akey}{LControlKey up}{Delete}")
+            return
+        previous = _save_clipboard()
+        _clipboard(text)
+        try:
+            obj.PressKeys("{LControlKey down}{Akey}{Vkey}{LControlKey up}")
+        finally:
+            _restore_clipboard(previous)
+
+    def _normalize(self, text):
+        return text.replace('\r\n', '\n')
+
+    def statistics(self):
+        stats = dict(self.used)
+        stats['failures'] = self.failures
+        return stats
+
+
+def _element_names(element):
+    """ Returns lowercase names which match element in RanoreXPath, e.g.
+    'listitem'. Like ranorex, any capability of the element matches.
+    """
+    names = set(capability.RxPathName.lower()
+                for capability in element.Capabilities)
+    names.add(element.PreferredCapability.RxPathName.lower())
+    return names
+
+
+def _keyword_name(name):
+    return name.strip().lower().replace(' ', '_')
+
+
+def _to_bool(value):
+    if isinstance(value, basestring):
+        return value.strip().lower() not in ('', 'false', 'no', 'off', '0', 'none')
+    return bool(value)
+
+
+def _in_sta(function):
+    """ Returns result of function run in STA thread. Clipboard can be
+    accessed only from STA thread so a thread is started for it.
+    """
+    result = []
+    errors = []
+    def access():
+        try:
+            result.append(function())
+        except Exception, error:
+            errors.append(error)
+    thread = System.Threading.Thread(System.Threading.ThreadStart(access))
+    thread.SetApartmentState(System.Threading.ApartmentState.STA)
+    thread.Start()
+    thread.Join()
+    if errors:
+        raise errors[0]
+    return result[0]
+
+
+def _clipboard(text):
+    """ Replaces contents of the clipboard with text, empty text clears it
+    """
+    clipboard = System.Windows.Forms.Clipboard
+    _in_sta(lambda: clipboard.SetText(text) if text else clipboard.Clear())
+
+
+def _clipboard_text():
+    clipboard = System.Windows.Forms.Clipboard
+    return _in_sta(clipboard.GetText)
+
+
+def _save_clipboard():
+    """ Returns copy of the clipboard in all formats which can be read,
+    not only text, for _restore_clipboard
+    """
+    def save():
+        saved = System.Windows.Forms.DataObject()
+        data = System.Windows.Forms.Clipboard.GetDataObject()
+        if data is not None:
+            for name in data.GetFormats(False):
+                try:
+                    saved.SetData(name, False, data.GetData(name, False))
+                except Exception:
+                    pass
+        return saved
+    return _in_sta(save)
+
+
+def _restore_clipboard(saved):
+    def restore():
+        if saved.GetFormats(False):
+            System.Windows.Forms.Clipboard.SetDataObject(saved, True)
+        else:
+            System.Windows.Forms.Clipboard.Clear()
+    _in_sta(restore)
+
+
+_ADAPTER_TYPES = _AdapterTypeTable(SUPPORTED_TYPES)
+_LOCATOR_CACHE = rxpath.LRUCache(1024)
+
 class RanorexLibrary(object):
     """ Basic implementation of ranorex object calls for
     robot framework
@@ -27,11 +547,18 @@ class RanorexLibrary(object):
         self.debug = False
         self.model_loaded = False
         self.model = None
+        self._element_cache = rxcache.ElementCache(clock=_clock)
+        self._settler = _Settler()
+        self._poller = _Poller()
+        self._screenshots = _ScreenshotDeduplicator()
+        self._selector = _Selector()
+        self._text_entry = _TextEntry()
         Ranorex.Mouse.DefaultMoveTime = 0
         Ranorex.Keyboard.DefaultKeyPressTime = 20
         #Ranorex.Delay.SpeedFactor = 0.0
         Ranorex.Adapter.DefaultSearchTimeout = 60000
         Ranorex.Adapter.DefaultUseEnsureVisible = True
+        Ranorex.Validate.EnableReport = False
 
     def start_debug(self):
         """ Starts to show debug messages on remote connector """
@@ -45,65 +572,220 @@ class RanorexLibrary(object):
     def __return_type(cls, locator):
         """ Function serves as translator from xpath into
         .net object that is recognized by ranorex.
-        Returns supported object type.
+        Returns supported adapter class.
         """
-        Ranorex.Validate.EnableReport = False
-        Ranorex.Adapter.DefaultUseEnsureVisible = True
-        supported_types = ['AbbrTag', 'AcronymTag', 'AddressTag', 'AreaTag',
-                           'ArticleTag', 'AsideTag', 'ATag', 'AudioTag',
-                           'BaseFontTag', 'BaseTag', 'BdoTag', 'BigTag',
-                           'BodyTag', 'BrTag', 'BTag', 'Button',
-                           'ButtonTag', 'CanvasTag', 'Cell', 'CenterTag',
-                           'CheckBox', 'CiteTag', 'CodeTag', 'ColGroupTag',
-                           'ColTag', 'Column', 'ComboBox', 'CommandTag',
-                           'Container', 'ContextMenu', 'DataListTag', 'DateTime',
-                           'DdTag', 'DelTag', 'DetailsTag', 'DfnTag',
-                           'DirTag', 'DivTag', 'DlTag', 'EmbedTag', 'EmTag',
-                           'FieldSetTag', 'FigureTag', 'FontTag', 'Form', 'FormTag',
-                           'Link', 'List', 'ListItem', 'MenuBar',
-                           'MenuItem', 'Picture', 'ProgressBar',
-                           'RadioButton', 'Row', 'ScrollBar', 'Slider',
-                           'StatusBar', 'Table', 'TabPage', 'Text', 'TitleBar',
-                           'ToggleButton', 'Tree', 'TreeItem', 'Unknown' ]
-                           
-        ele = RanorexLibrary.extract_element(locator)
-            
-        for item in supported_types:
-            if ele.lower() == item.lower():
-                return item
-            elif ele.lower() == '':
+        with _TRACER.span('resolve'):
+            adapter = _LOCATOR_CACHE.get(locator)
+            if adapter is not None:
+                return adapter
+
+            ele = RanorexLibrary.extract_element(locator)
+            if ele == '':
                 raise AssertionError("No element entered")
-                
-        log = logging.getLogger("Return type")
-        log.debug("Ranorex supports: %s", dir(Ranorex))
-            
-        raise AssertionError("Element is not supported. Entered element: %s" %ele)
-    
+
+            name = _ADAPTER_TYPES.lookup(ele)
+            if name is None:
+                log = logging.getLogger("Return type")
+                log.debug("Ranorex supports: %s", dir(Ranorex))
+                raise AssertionError("Element is not supported. Entered element: %s" %ele)
+
+            adapter = getattr(Ranorex, name)
+            _LOCATOR_CACHE.put(locator, adapter)
+            return adapter
+
+    @concurrency(PARALLEL)
+    def get_locator_cache_statistics(self):
+        """ Returns hit/miss counters of the locator type resolver
+        """
+        return {'types': _ADAPTER_TYPES.statistics(),
+                'locators': _LOCATOR_CACHE.statistics(),
+                'parser': rxpath.parse_statistics()}
+
+    def _find(self, adapter, locator):
+        """ Finds element with adapter, reusing cached element if the
+        element cache is enabled.
+        """
+        with _TRACER.span('find'):
+            return self._element_cache.find(adapter, locator)
+
+    def set_element_cache_policy(self, enabled=True, ttl=5000, validate=True):
+        """ Enables or disables reuse of found elements between keywords.
+        ttl is in ms. If validate is set, cached elements are checked to be
+        still valid before they are reused.
+        """
+        cache = self._element_cache
+        cache.enabled = _to_bool(enabled)
+        cache.ttl = int(ttl) / 1000.0
+        cache.validate = _to_bool(validate)
+        cache.clear()
+        if self.debug:
+            log = logging.getLogger("Set Element Cache Policy")
+            log.debug("Policy: %s", cache.statistics())
+        return True
+
+    def _processes_changed(self):
+        """ Called after keyword started or stopped processes, also when
+        it failed. Calling it before the action would let parallel process
+        checks cache the old state again.
+        """
+        self._element_cache.clear()
+        _PROCESSES.invalidate()
+
+    def clear_element_cache(self):
+        """ Forgets all cached elements.
+        """
+        self._element_cache.clear()
+        return True
+
+    @concurrency(PARALLEL)
+    def get_element_cache_statistics(self):
+        """ Returns policy and hit/miss counters of the element cache
+        """
+        return self._element_cache.statistics()
+
+    def set_settle_strategy(self, mode, timeout=None, keyword=None):
+        """ Sets how keywords wait for the UI after acting on it.
+        mode is one of fixed, none or condition. timeout (ms) replaces the
+        keyword's own delay; in condition mode it is the longest wait.
+        If keyword is given only that keyword is changed, mode 'default'
+        removes such override.
+        """
+        mode = mode.strip().lower()
+        if keyword and mode == 'default':
+            self._settler.overrides.pop(_keyword_name(keyword), None)
+            return True
+        if mode not in _Settler.MODES:
+            raise AssertionError("Settle mode must be one of %s"
+                                 % ', '.join(_Settler.MODES))
+        if timeout is not None:
+            timeout = int(timeout) / 1000.0
+        if keyword:
+            self._settler.overrides[_keyword_name(keyword)] = (mode, timeout)
+        else:
+            self._settler.mode = mode
+            self._settler.timeout = timeout
+        return True
+
+    @concurrency(PARALLEL)
+    def get_settle_statistics(self):
+        """ Returns settle strategy and time spent and saved (in seconds)
+        compared to the fixed delays.
+        """
+        return self._settler.statistics()
+
+    @concurrency(PARALLEL)
+    def get_wait_statistics(self):
+        """ Returns iterations, time waited and time lost to polling
+        intervals of the wait keywords, per kind of wait and for the
+        last waits.
+        """
+        return self._poller.statistics()
+
+    def set_keyword_tracing(self, enabled=True, size=None):
+        """ Enables or disables recording how long UI keywords and their
+        phases take. size changes the number of latest spans kept, 10000
+        by default.
+        """
+        _TRACER.enabled = _to_bool(enabled)
+        if size is not None:
+            _TRACER.resize(int(size))
+        return True
+
+    @concurrency(PARALLEL)
+    def get_keyword_trace(self, path=None, clear=False, blob=False):
+        """ Returns recorded keyword and phase spans as Chrome trace event
+        JSON, which can be opened in chrome://tracing or Perfetto. If path
+        is given, the trace is written to that file on the server and the
+        path is returned. If clear is set, recorded spans are removed. If
+        blob is set a blob handle is returned as in Take Screenshot.
+        """
+        trace = json.dumps(_TRACER.chrome_trace())
+        if _to_bool(clear):
+            _TRACER.clear()
+        if path:
+            with open(path, 'w') as trace_file:
+                trace_file.write(trace)
+            return path
+        if _to_bool(blob):
+            return Blob(trace)
+        return trace
+
+    def run_keyword_batch(self, *steps):
+        """ Runs several keywords of this library in one call. Keywords are
+        separated with AND, arguments in form name=value are passed as
+        named arguments if the keyword has such argument or accepts any
+        named arguments.
+        All steps are checked before any of them is run. Stops at the first
+        failing keyword and returns list of return values.
+        """
+        if self.debug:
+            log = logging.getLogger("Run Keyword Batch")
+            log.debug("Steps: %s", steps)
+        batch = self._split_batch(steps)
+        calls = [self._batch_call(step) for step in batch]
+        results = []
+        for index, (step, (name, args, kwargs)) in enumerate(zip(batch, calls)):
+            try:
+                results.append(getattr(self, name)(*args, **kwargs))
+            except Exception as error:
+                if self.debug:
+                    log.error("Step %d failed because of %s", index + 1, error)
+                raise AssertionError("Step %d (%s) failed: %s"
+                                     % (index + 1, step[0], error))
+        return results
+
+    @staticmethod
+    def _split_batch(steps):
+        batch = [[]]
+        for item in steps:
+            if item == 'AND':
+                batch.append([])
+            else:
+                batch[-1].append(item)
+        if not all(batch):
+            raise AssertionError("Run Keyword Batch got an empty step")
+        return batch
+
+    def _batch_call(self, step):
+        name = _keyword_name(step[0])
+        method = getattr(self, name, None)
+        if name.startswith('_') or name == 'run_keyword_batch' or \
+                not inspect.ismethod(method):
+            raise AssertionError("No keyword '%s' to run in batch" % step[0])
+        # arguments of traced keywords are those of the wrapped function
+        spec = inspect.getargspec(getattr(method, 'robot_wrapped', method))
+        names, any_name = spec[0], spec[2] is not None
+        args = []
+        kwargs = {}
+        for arg in step[1:]:
+            key, sep, value = arg.partition('=') if isinstance(arg, basestring) \
+                else (None, None, None)
+            if sep and (key in names or any_name and key):
+                kwargs[str(key)] = value
+            else:
+                args.append(arg)
+        return name, args, kwargs
+
     @classmethod
+    @concurrency(PARALLEL)
     def extract_element(cls, xpath):
-        split_locator = xpath.split('/')
-        
-        if "[" in split_locator[-1]:
-            ele = split_locator[-1].split('[')[0]
-            
-        elif "[" in split_locator[-2] and "]" in split_locator[-1]:
-            # Appears that a forward slash was within a predicate eg. text[@caption='some / randon string']
-            # so look for the element in the position -2 rather than -1
-            ele = split_locator[-2].split('[')[0]
-            
-        elif ".." in split_locator[-1]:
-            # We found a parent selector in the last element e.g. /row/cell[@text='${ActiveForm}']/..
-            # so parent we need is in position -3
-            ele = split_locator[-3]
-            
-        else:
-            ele = split_locator[-1]
-            
-        return ele
-    
+        """ Returns name of the element locator points to.
+        Parent hops (..) are followed back to the element they select.
+        """
+        return rxpath.parse(xpath).target
+
+    @concurrency(PARALLEL)
+    def normalize_locator(self, locator):
+        """ Returns canonical form of the locator.
+        """
+        return rxpath.parse(locator).canonical
+
     def kill_all_browsers(self):
-        os.system("TASKKILL /F /IM chrome.exe")
-        os.system("TASKKILL /F /IM iexplore.exe")    
+        try:
+            os.system("TASKKILL /F /IM chrome.exe")
+            os.system("TASKKILL /F /IM iexplore.exe")
+        finally:
+            self._processes_changed()
 
     def kill_browser(self, browser):
         """ Kill the browser
@@ -111,7 +793,10 @@ class RanorexLibrary(object):
         if self.debug:
             log = logging.getLogger("Kill Browser")
             log.debug("browser: %s", browser)
-        Ranorex.Host.Local.KillBrowser(browser)
+        try:
+            Ranorex.Host.Local.KillBrowser(browser)
+        finally:
+            self._processes_changed()
         time.sleep(0.5)
 
     def close_browser(self, browser):
@@ -130,7 +815,10 @@ class RanorexLibrary(object):
         else:
             raise AssertionError("Browser not recognised: %s" %browser)
             
-        Ranorex.Host.Local.CloseApplications(processName)
+        try:
+            Ranorex.Host.Local.CloseApplications(processName)
+        finally:
+            self._processes_changed()
         Ranorex.Delay.Seconds(1)
 
     def open_browser(self, url, browser, maximize=False):
@@ -140,9 +828,13 @@ class RanorexLibrary(object):
             log = logging.getLogger("Open Browser")
             log.debug("url: %s", url)
             log.debug("browser: %s", browser)
-        Ranorex.Host.Local.OpenBrowser(url, browser, True, maximize)
+        try:
+            Ranorex.Host.Local.OpenBrowser(url, browser, True, maximize)
+        finally:
+            self._processes_changed()
         Ranorex.Delay.Seconds(1)
 
+    @_traced
     def check_if_element_exists(self, locator, duration=60000):
         """ Checks if the element exists within the timout (or specified duration)
         """
@@ -153,6 +845,7 @@ class RanorexLibrary(object):
         Ranorex.Validate.Exists(locator, int(duration))
         return True
 
+    @_traced
     def check_if_element_does_not_exist(self, locator, duration=60000):
         """ Checks if the element does not exist within the timout (or specified duration)
         """
@@ -163,6 +856,7 @@ class RanorexLibrary(object):
         Ranorex.Validate.NotExists(locator, int(duration))
         return True
         
+    @_traced
     def click_element(self, locator, location=None, accessible=True):
         """ Clicks on element identified by locator and location
         """
@@ -171,10 +865,10 @@ class RanorexLibrary(object):
             log.debug("Locator: %s", locator)
             log.debug("Location: %s", location)
             log.debug("Accessible Check: %s", accessible)
-        element = self.__return_type(locator)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
-        ele = getattr(Ranorex, element)(locator)
+            log.debug("Element: %s", adapter)
+        ele = self._find(adapter, locator)
         if self.debug:
             log.debug("Application object: %s", ele)
             
@@ -182,10 +876,11 @@ class RanorexLibrary(object):
             if self._wait_until_element_accessible(ele) == False:
                 raise AssertionError("Element did not become accessible")
 
+        before = self._settler.snapshot('click_element', ele)
         try:
             if location == None:
                 ele.Click()
-                Ranorex.Delay.Seconds(1)
+                self._settler.settle('click_element', 1, ele, before)
                 return True
             else:
                 if not isinstance(location, basestring):
@@ -213,7 +908,7 @@ class RanorexLibrary(object):
                    location = [int(x) for x in location.split(',')]
                    ele.Click(Ranorex.Location(location[0], location[1]))
                    
-                Ranorex.Delay.Seconds(1)
+                self._settler.settle('click_element', 1, ele, before)
                 return True
         except Exception as error:
             if self.debug:
@@ -225,11 +920,8 @@ class RanorexLibrary(object):
         """
         if self.debug:
             log = logging.getLogger("Wait Until Element Accessible")
-            
-        curr_time = 0
-        timeout = int(timeout)/1000
-        
-        while curr_time != timeout:
+
+        def accessible():
             enabled = ele.Element.GetAttributeValue("Enabled")
             visible = ele.Element.GetAttributeValue("Visible")
 
@@ -237,14 +929,13 @@ class RanorexLibrary(object):
                 log.debug("Element enabled: %s", enabled)
                 log.debug("Element visible: %s", visible)
 
-            if enabled == True and visible == True:
-                return True
-                
-            time.sleep(5)
-            curr_time += 5
-            
-        return False
+            return enabled == True and visible == True
+
+        with _TRACER.span('wait'):
+            return self._poller.poll('accessible', accessible,
+                                     int(timeout) / 1000.0)
     
+    @_traced
     def check(self, locator):
         """ Check if element is checked. If not it check it.
             Only checkbox and radiobutton are supported.
@@ -253,54 +944,70 @@ class RanorexLibrary(object):
         if self.debug:
             log = logging.getLogger("Check")
             log.debug("Locator: %s", locator)
-        element = self.__return_type(locator)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
-        if element == 'CheckBox' or element == 'RadioButton':
+            log.debug("Element: %s", adapter)
+        if adapter in (Ranorex.CheckBox, Ranorex.RadioButton):
             if self.debug:
                 log.debug("Element is radiobutton or checkbox")
-            obj = getattr(Ranorex, element)(locator)
+            obj = self._find(adapter, locator)
             if self.debug:
                 log.debug("Application object: %s", obj)
             if not obj.Element.GetAttributeValue('Checked'):
-                obj.Element.GetAttributeValue('Checked')
+                before = self._settler.snapshot('check', obj)
                 obj.Click()
-                Ranorex.Delay.Seconds(1)
+                self._settler.settle('check', 1, obj, before)
                 return True
         else:
             raise AssertionError("Element |%s| is not supported for checking" %
-                                 element)
+                                 adapter.__name__)
 
     @classmethod
+    @concurrency(PARALLEL)
     def check_if_process_is_running(cls, process_name):
         """ Check if process with desired name is running.
-            Returns name of process if running
+            Image name must match exactly, the .exe extension is optional.
         """
-        proc = subprocess.Popen(['tasklist'], stdout=subprocess.PIPE)
-        out = proc.communicate()[0]
-        return out.find(process_name) != -1 if out else False
+        return _PROCESSES.is_running(process_name)
 
-    def clear_text(self, locator):
+    @concurrency(PARALLEL)
+    def get_process_inventory_statistics(self):
+        """ Returns backend and snapshot hit counters of the process
+        inventory.
+        """
+        return _PROCESSES.statistics()
+
+    @_traced
+    def clear_text(self, locator, mode='keys'):
         """ Clears text from text box. Only element Text is supported.
+        With mode 'auto' or 'value' the text is cleared by setting the value
+        of the element when possible.
         """
         if self.debug:
             log = logging.getLogger("Clear Text")
             log.debug("Locator: %s", locator)
-        element = self.__return_type(locator)
+            log.debug("Mode: %s", mode)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
-        if element != "Text":
+            log.debug("Element: %s", adapter)
+        if adapter is not Ranorex.Text:
             if self.debug:
                 log.error("Element is not a text field")
             raise AssertionError("Only element Text is supported!")
         else:
-            obj = getattr(Ranorex, element)(locator)
+            obj = self._find(adapter, locator)
             if self.debug:
                 log.debug("Application object: %s", obj)
-            obj.PressKeys("{End}{Shift down}{Home}{Shift up}{Delete}")
+            if mode.lower() == 'keys':
+                obj.PressKeys("{End}{Shift down}{Home}{Shift up}{Delete}")
+            else:
+                strategy = self._text_entry.replace(obj, '', mode)
+                if self.debug:
+                    log.debug("Cleared with: %s", strategy)
             return True
         raise AssertionError("Element %s does not exists" % locator)
 
+    @_traced
     def drag(self, locator1, locator2):
         """ Put the mouse button down on the element for dragging
         """
@@ -308,23 +1015,23 @@ class RanorexLibrary(object):
             log = logging.getLogger("Drag on Element")
             log.debug("Locator: %s", locator1)
             log.debug("Locator: %s", locator2)
-        element1 = self.__return_type(locator1)
-        element2 = self.__return_type(locator2)
+        adapter1 = self.__return_type(locator1)
+        adapter2 = self.__return_type(locator2)
         if self.debug:
-            log.debug("Element: %s", element1)
-            log.debug("Element: %s", element2)
-        obj1 = getattr(Ranorex, element1)(locator1)
-        obj2 = getattr(Ranorex, element2)(locator2)
+            log.debug("Element: %s", adapter1)
+            log.debug("Element: %s", adapter2)
+        obj1 = self._find(adapter1, locator1)
+        obj2 = self._find(adapter2, locator2)
         if self.debug:
             log.debug("Application object: %s", obj1)
             log.debug("Application object: %s", obj2)
         try:
             obj1.MoveTo()
-            Ranorex.Delay.Milliseconds(500)
+            self._settler.settle('drag', 0.5)
             Ranorex.Mouse.ButtonDown(System.Windows.Forms.MouseButtons.Left)
-            Ranorex.Delay.Milliseconds(500)
+            self._settler.settle('drag', 0.5)
             obj2.MoveTo()
-            Ranorex.Delay.Milliseconds(500)
+            self._settler.settle('drag', 0.5)
             obj2.MoveTo(Ranorex.Location.CenterLeft)
             obj2.MoveTo(Ranorex.Location.Center)
             Ranorex.Mouse.ButtonUp(System.Windows.Forms.MouseButtons.Left)
@@ -334,6 +1041,7 @@ class RanorexLibrary(object):
             raise AssertionError(error)
 
 
+    @_traced
     def double_click_element(self, locator, location=None, accessible=True):
         """ Doubleclick on element identified by locator. It can click
             on desired location if requested.
@@ -343,10 +1051,10 @@ class RanorexLibrary(object):
             log.debug("Locator: %s", locator)
             log.debug("Location: %s", location)
             log.debug("Accessible Check: %s", accessible)
-        element = self.__return_type(locator)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
-        ele = getattr(Ranorex, element)(locator)
+            log.debug("Element: %s", adapter)
+        ele = self._find(adapter, locator)
         if self.debug:
             log.debug("Application object: %s", ele)
             
@@ -354,10 +1062,11 @@ class RanorexLibrary(object):
             if self._wait_until_element_accessible(ele) == False:
                 raise AssertionError("Element did not become accessible")
             
+        before = self._settler.snapshot('double_click_element', ele)
         try:
             if location == None:
                 ele.DoubleClick()
-                Ranorex.Delay.Seconds(1)
+                self._settler.settle('double_click_element', 1, ele, before)
                 return True
                 
             else:
@@ -370,47 +1079,115 @@ class RanorexLibrary(object):
                    location = [int(x) for x in location.split(',')]
                    ele.DoubleClick(Ranorex.Location(location[0], location[1]))
                    
-                Ranorex.Delay.Seconds(1)
+                self._settler.settle('double_click_element', 1, ele, before)
                 return True
                 
         except Exception as error:
             raise AssertionError(error)
 
-    def get_table(self, locator):
-        """ Get content of table without headers
+    @_traced
+    def get_table(self, locator, headers=False, columns=None, offset=0,
+                  limit=None, mode='cells', separator=';'):
+        """ Get content of table, with column headers as the first row
+        if headers is set.
+        columns selects columns by comma separated indexes or header names,
+        offset and limit select rows. Mode 'cells' reads every cell,
+        'rows' reads the value of whole row with one call and splits it
+        with separator, 'clipboard' copies the table with Ctrl+A Ctrl+C
+        and parses the copied text. Both fall back to reading cells.
 
         :param locator: xpath string selecting element on screen
         :return: two dimensional array with content of the table
         """
-        element_type = self.__return_type(locator)
-        element = getattr(Ranorex, element_type)(locator)
-        table = [[cell.Text for cell in row.Cells] for row in element.Rows]
-
+        if self.debug:
+            log = logging.getLogger("Get Table")
+            log.debug("Locator: %s", locator)
+            log.debug("Mode: %s", mode)
+        header_row = None
+        adapter = self.__return_type(locator)
+        element = self._find(adapter, locator)
+        if _to_bool(headers) or rxtable.has_names(columns):
+            header_row = [header.Text for header in
+                          element.FindDescendants[Ranorex.ColumnHeader]()]
+        reader = rxtable.TableReader(element, mode.lower(),
+                                     rxtable.parse_columns(columns, header_row),
+                                     int(offset), int(limit) if limit else None,
+                                     separator)
+        table = None
+        if reader.mode == 'clipboard':
+            table = self._copy_table(element, reader, header_row)
+        if table is None:
+            table = list(reader.rows())
+        if self.debug:
+            log.debug("Rows: %d, adapter calls: %d", len(table), reader.calls)
+        if _to_bool(headers):
+            table.insert(0, rxtable.project(header_row, reader.columns))
         return table
 
-    def count_list_items(self, locator, childLocator):
+    def _copy_table(self, element, reader, header_row):
+        """ Reads table through clipboard, returns None when nothing
+        was copied. Previous clipboard contents are restored.
+        """
+        previous = _save_clipboard()
+        try:
+            element.Focus()
+            Ranorex.Keyboard.Press('{LControlKey down}{Akey}{Ckey}{LControlKey up}')
+            text = _clipboard_text()
+        finally:
+            _restore_clipboard(previous)
+        if not text:
+            return None
+        rows = rxtable.parse_clipboard(text)
+        if header_row and rows and rows[0] == header_row:
+            rows = rows[1:]
+        return reader.select(rows)
+
+    @_traced
+    def count_list_items(self, locator, childLocator, max_depth=None):
         """ Count the items in a list, only works on a list
+        Items are counted without creating adapters for them. max_depth
+        limits how deep descendant ('//') steps of childLocator search.
         """
         if self.debug:
             log = logging.getLogger("Count List Items")
             log.debug("Locator: %s", locator)
             log.debug("Child Locator: %s", childLocator)
-        element = self.__return_type(locator)
+            log.debug("Max depth: %s", max_depth)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
-        if element != "List":
+            log.debug("Element: %s", adapter)
+        if adapter is not Ranorex.List:
             if self.debug:
                 log.error("Element is not a list field")
             raise AssertionError("Only element List is supported!")
         else:
-            obj = getattr(Ranorex, element)(locator)
+            obj = self._find(adapter, locator)
             if self.debug:
                 log.debug("Application object: %s", obj)
-            items = obj.Find[Ranorex.ListItem](childLocator)
+            count = rxtree.count(self._list_items(obj, childLocator, max_depth))
             if self.debug:
-                log.debug("Count: %s", items.Count)
-            return items.Count
+                log.debug("Count: %s", count)
+            return count
+
+    def _list_items(self, obj, childLocator, max_depth=None, offset=0,
+                    limit=None):
+        """ Lazily yields elements of list items found by childLocator.
+        Simple locators are walked child by child, others are found with
+        ranorex. Only elements which are list items are returned.
+        """
+        steps = rxtree.simple_steps(childLocator)
+        max_depth = int(max_depth) if max_depth else None
+        if steps is None:
+            items = (item.Element for item
+                     in obj.Find[Ranorex.ListItem](childLocator))
+        else:
+            items = (item for item
+                     in rxtree.select(obj.Element, steps, _element_names,
+                                      max_depth)
+                     if 'listitem' in _element_names(item))
+        return rxtree.page(items, int(offset), int(limit) if limit else None)
 
+    @_traced
     def get_element_attribute(self, locator, attribute):
         """ Get specified element attribute.
         """
@@ -418,10 +1195,10 @@ class RanorexLibrary(object):
             log = logging.getLogger("Get Element Attribute")
             log.debug("Locator: %s", locator)
             log.debug("Attribute: %s", attribute)
-        element = self.__return_type(locator)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
-        obj = getattr(Ranorex, element)(locator)
+            log.debug("Element: %s", adapter)
+        obj = self._find(adapter, locator)
         if self.debug:
             log.debug("Application object: %s", obj)
         found = obj.Element.GetAttributeValue(attribute)
@@ -429,49 +1206,154 @@ class RanorexLibrary(object):
             log.debug("Found attribute value is: %s", found)
         return found
 
-    def get_list_items_attribute(self, locator, childLocator, attribute):
-        """ Get specified attribute of the list items in a list
+    @_traced
+    def get_element_attributes(self, locator, *attributes):
+        """ Get several attributes of element found once as dictionary of
+        attribute name -> value. All supported attributes are returned if
+        no attributes or '*' is given.
         """
+        if self.debug:
+            log = logging.getLogger("Get Element Attributes")
+            log.debug("Locator: %s", locator)
+            log.debug("Attributes: %s", attributes)
+        adapter = self.__return_type(locator)
+        if self.debug:
+            log.debug("Element: %s", adapter)
+        obj = self._find(adapter, locator)
+        if self.debug:
+            log.debug("Application object: %s", obj)
+        found = self._attribute_values(obj.Element, attributes)
+        if self.debug:
+            log.debug("Found attribute values are: %s", found)
+        return found
+
+    def _attribute_values(self, element, attributes):
+        if not attributes or list(attributes) == ['*']:
+            attributes = self._supported_attributes(element)
+        return dict((attribute, element.GetAttributeValue(attribute))
+                    for attribute in attributes)
+
+    @staticmethod
+    def _supported_attributes(element):
+        return [descriptor.Name for descriptor
+                in element.GetSupportedAttributes()]
+
+    @_traced
+    def get_list_items_attribute(self, locator, childLocator, *attributes,
+                                 **options):
+        """ Get specified attribute of the list items in a list.
+        With several attributes or '*' a dictionary of attribute name ->
+        value is returned for each item, '*' is resolved with the first item.
+        The attribute can also be given as named argument attribute.
+        Named options offset and limit return one page of items and
+        max_depth limits how deep descendant steps of childLocator search.
+        """
+        attributes = list(attributes)
+        if 'attribute' in options:
+            attributes.insert(0, options.pop('attribute'))
         if self.debug:
             log = logging.getLogger("Get List Items Attribute")
             log.debug("Locator: %s", locator)
             log.debug("Child Locator: %s", childLocator)
-            log.debug("Attribute: %s", attribute)
-        element = self.__return_type(locator)
-        if self.debug:
-            log.debug("Element: %s", element)
-        if element != "List":
+            log.debug("Attributes: %s", attributes)
+            log.debug("Options: %s", options)
+        if not attributes:
+            raise AssertionError("Get List Items Attribute needs at least "
+                                 "one attribute")
+        unknown = set(options) - set(['offset', 'limit', 'max_depth'])
+        if unknown:
+            raise AssertionError("Unknown options: %s"
+                                 % ', '.join(sorted(unknown)))
+        adapter = self.__return_type(locator)
+        if self.debug:
+            log.debug("Element: %s", adapter)
+        if adapter is not Ranorex.List:
             if self.debug:
                 log.error("Element is not a list field")
             raise AssertionError("Only element List is supported!")
         else:
-            obj = getattr(Ranorex, element)(locator)
+            obj = self._find(adapter, locator)
             if self.debug:
                 log.debug("Application object: %s", obj)
                 
-            items = obj.Find[Ranorex.ListItem](childLocator)
-            itemValues = [item.Element.GetAttributeValue(attribute) for item in items]
+            items = self._list_items(obj, childLocator, **options)
+            if len(attributes) == 1 and attributes[0] != '*':
+                itemValues = [item.GetAttributeValue(attributes[0])
+                              for item in items]
+            else:
+                itemValues = []
+                for item in items:
+                    if attributes == ['*']:
+                        attributes = self._supported_attributes(item)
+                    itemValues.append(self._attribute_values(item, attributes))
             if self.debug:
                 log.debug("Item Values: %s", itemValues)
             return itemValues
 
-    def input_text(self, locator, text):
+    @_traced
+    def input_text(self, locator, text, mode='keys', key_press_time=None):
         """ input texts into specified locator.
+        With mode 'keys' text is typed and may contain key sequences.
+        Modes 'auto', 'value' and 'paste' append text as in Set Text.
+        key_press_time (ms) changes typing speed for this call.
         """
         if self.debug:
             log = logging.getLogger("Input Text")
             log.debug("Locator: %s", locator)
             log.debug("Text to enter: %s", text)
-        element = self.__return_type(locator)
+            log.debug("Mode: %s", mode)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
-        obj = getattr(Ranorex, element)(locator)
+            log.debug("Element: %s", adapter)
+        obj = self._find(adapter, locator)
         if self.debug:
             log.debug("Application object: %s", obj)
-        obj.PressKeys(text)
-        Ranorex.Delay.Seconds(1)
+        before = self._settler.snapshot('input_text', obj)
+        if mode.lower() == 'keys':
+            self._text_entry.type_keys(obj, text, key_press_time)
+        else:
+            current = self._text_entry.current(obj) or ''
+            strategy = self._text_entry.replace(obj, current + text, mode,
+                                                key_press_time)
+            if self.debug:
+                log.debug("Entered with: %s", strategy)
+        self._settler.settle('input_text', 1, obj, before)
         return True
 
+    @_traced
+    def set_text(self, locator, text, mode='auto', key_press_time=None):
+        """ Replaces text of element with text and verifies it.
+        Mode 'auto' sets the value of the element, pastes the text from
+        the clipboard or types it, whichever works first. Modes 'value',
+        'paste' and 'keys' use only one of them. key_press_time (ms)
+        changes typing speed for this call.
+        """
+        if self.debug:
+            log = logging.getLogger("Set Text")
+            log.debug("Locator: %s", locator)
+            log.debug("Text to set: %s", text)
+            log.debug("Mode: %s", mode)
+        adapter = self.__return_type(locator)
+        if self.debug:
+            log.debug("Element: %s", adapter)
+        obj = self._find(adapter, locator)
+        if self.debug:
+            log.debug("Application object: %s", obj)
+        before = self._settler.snapshot('set_text', obj)
+        strategy = self._text_entry.replace(obj, text, mode, key_press_time)
+        if self.debug:
+            log.debug("Set with: %s", strategy)
+        self._settler.settle('set_text', 1, obj, before)
+        return True
+
+    @concurrency(PARALLEL)
+    def get_text_entry_statistics(self):
+        """ Returns how many times each Set Text strategy was used and
+        how many times setting text failed.
+        """
+        return self._text_entry.statistics()
+
+    @_traced
     def right_click_element(self, locator, location=None):
         """ Rightclick on desired element identified by locator.
         Location of click can be used.
@@ -480,15 +1362,16 @@ class RanorexLibrary(object):
             log = logging.getLogger("Right Click Element")
             log.debug("Locator: %s", locator)
             log.debug("Location: %s", location)
-        element = self.__return_type(locator)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
-        obj = getattr(Ranorex, element)(locator)
+            log.debug("Element: %s", adapter)
+        obj = self._find(adapter, locator)
         if self.debug:
             log.debug("Application object: %s", obj)
+        before = self._settler.snapshot('right_click_element', obj)
         if location == None:
             obj.Click(System.Windows.Forms.MouseButtons.Right)
-            Ranorex.Delay.Seconds(1)
+            self._settler.settle('right_click_element', 1, obj, before)
             return True
         else:
             if not isinstance(location, basestring):
@@ -496,7 +1379,7 @@ class RanorexLibrary(object):
             location = [int(x) for x in location.split(',')]
             obj.Click(System.Windows.Forms.MouseButtons.Right,
                       Ranorex.Location(location[0], location[1]))
-            Ranorex.Delay.Seconds(1)
+            self._settler.settle('right_click_element', 1, obj, before)
             return True
 
     def run_application(self, app):
@@ -506,7 +1389,10 @@ class RanorexLibrary(object):
             log = logging.getLogger("Run Application")
             log.debug("Application: %s", app)
             log.debug("Working dir: %s", os.getcwd())
-        Ranorex.Host.Local.RunApplication(app)
+        try:
+            Ranorex.Host.Local.RunApplication(app)
+        finally:
+            self._processes_changed()
         return True
 
     def run_application_with_parameters(self, app, params):
@@ -517,9 +1403,13 @@ class RanorexLibrary(object):
             log.debug("Application: %s", app)
             log.debug("Parameters: %s", params)
             log.debug("Working dir: %s", os.getcwd())
-        Ranorex.Host.Local.RunApplication(app, params)
+        try:
+            Ranorex.Host.Local.RunApplication(app, params)
+        finally:
+            self._processes_changed()
         return True
 
+    @concurrency(PARALLEL)
     def run_script(self, script_path):
         """ Runs script on remote machine and returns stdout and stderr.
         """
@@ -533,6 +1423,7 @@ class RanorexLibrary(object):
         output = process.communicate()
         return {'stdout':output[0], 'stderr':output[1]}
 
+    @concurrency(PARALLEL)
     def run_script_with_parameters(self, script_path, params):
         """ Runs script on remote machine and returns stdout and stderr.
         """
@@ -547,6 +1438,7 @@ class RanorexLibrary(object):
         output = process.communicate()
         return {'stdout':output[0], 'stderr':output[1]}
 
+    @_traced
     def scroll(self, locator, amount):
         """ Hover above selected element and scroll positive or negative
         amount of wheel turns
@@ -558,10 +1450,10 @@ class RanorexLibrary(object):
         if self.debug:
             log = logging.getLogger("Scroll")
             log.debug("Locator: %s", locator)
-        elem_type = self.__return_type(locator)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", elem_type)
-        element = getattr(Ranorex, elem_type)(locator)
+            log.debug("Element: %s", adapter)
+        element = self._find(adapter, locator)
         if self.debug:
             log.debug("Application object: %s", element)
         
@@ -569,37 +1461,68 @@ class RanorexLibrary(object):
         mouse.MoveTo(element.Element)
         mouse.ScrollWheel(int(amount))
 
+    @_traced
     def select_by_index(self, locator, index):
-        """ Selects item from combobox according to index.
+        """ Selects item from combobox or list according to index.
+        Item is selected directly if the element allows it, otherwise with
+        the shortest key sequence. Selected index is verified.
         """
         if self.debug:
             log = logging.getLogger("Select By Index")
             log.debug("Locator: %s", locator)
             log.debug("Index: %s", index)
-        element = self.__return_type(locator)
+        obj = self._selectable(locator)
+        strategy = self._selector.select(obj, int(index))
         if self.debug:
-            log.debug("Element: %s", element)
-        obj = getattr(Ranorex, element)(locator)
+            log.debug("Selected with: %s", strategy)
+        return True
+
+    @_traced
+    def select_by_text(self, locator, text):
+        """ Selects item with text from combobox or list. Item is selected
+        directly if the element allows it, otherwise by typing the text.
+        """
         if self.debug:
-            log.debug("Application object: %s", obj)
-        selected = obj.Element.GetAttributeValue("SelectedItemIndex")
+            log = logging.getLogger("Select By Text")
+            log.debug("Locator: %s", locator)
+            log.debug("Text: %s", text)
+        obj = self._selectable(locator)
+        index = self._selector.index_of(obj, "Text", text)
+        strategy = self._selector.select(obj, index, text)
         if self.debug:
-            log.debug("Selected item: %s", selected)
-        diff = int(selected) - int(index)
+            log.debug("Selected index %d with: %s", index, strategy)
+        return True
+
+    @_traced
+    def select_by_value(self, locator, value):
+        """ Selects item whose Value attribute is value from combobox or list.
+        """
         if self.debug:
-            log.debug("Diff for keypress: %s", diff)
-        if diff >= 0:
-            for _ in range(0, diff):
-                obj.PressKeys("{up}")
-                if self.debug:
-                    log.debug("Up")
-        elif diff < 0:
-            for _ in range(0, abs(diff)):
-                obj.PressKeys("{down}")
-                if self.debug:
-                    log.debug("Down")
+            log = logging.getLogger("Select By Value")
+            log.debug("Locator: %s", locator)
+            log.debug("Value: %s", value)
+        obj = self._selectable(locator)
+        index = self._selector.index_of(obj, "Value", value)
+        strategy = self._selector.select(obj, index)
+        if self.debug:
+            log.debug("Selected index %d with: %s", index, strategy)
         return True
 
+    def _selectable(self, locator):
+        adapter = self.__return_type(locator)
+        if self.debug:
+            log = logging.getLogger("Select")
+            log.debug("Element: %s", adapter)
+        return self._find(adapter, locator)
+
+    @concurrency(PARALLEL)
+    def get_selection_statistics(self):
+        """ Returns how many selections each strategy made and how many
+        selections failed.
+        """
+        return self._selector.statistics()
+
+    @_traced
     def set_list_selected_index(self, locator, index):
         """ Set the list selected index
         """
@@ -607,17 +1530,17 @@ class RanorexLibrary(object):
             log = logging.getLogger("Set List Selected Index")
             log.debug("Locator: %s", locator)
             log.debug("Index: %s", index)
-        element = self.__return_type(locator)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
+            log.debug("Element: %s", adapter)
 
-        if element != "List":
+        if adapter is not Ranorex.List:
             if self.debug:
                 log.error("Element is not a list")
             raise AssertionError("Only element List is supported!")
         else:
             try:
-                ele = getattr(Ranorex, element)(locator)
+                ele = self._find(adapter, locator)
                 if self.debug:
                     log.debug("Application object: %s", ele)
                     
@@ -636,6 +1559,7 @@ class RanorexLibrary(object):
                     log.error("Failed because of %s", error)
                 raise AssertionError(error)
 
+    @_traced
     def send_keys(self, locator, key_seq):
         """ Send key combination to specified element.
         Also it gets focus before executing sequence
@@ -648,51 +1572,97 @@ class RanorexLibrary(object):
             log.debug("Key sequence: %s", key_seq)
         Ranorex.Keyboard.PrepareFocus(locator)
         Ranorex.Keyboard.Press(key_seq)
-        time.sleep(0.5)
+        self._settler.settle('send_keys', 0.5)
         return True
 
+    @_traced
     def set_focus(self, locator):
         """ Sets focus on desired location.
         """
         if self.debug:
             log = logging.getLogger("Set Focus")
             log.debug("Locator: %s", locator)
-        element = self.__return_type(locator)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
-        obj = getattr(Ranorex, element)(locator)
+            log.debug("Element: %s", adapter)
+        obj = self._find(adapter, locator)
         if self.debug:
             log.debug("Application object: %s", obj)
+        before = self._settler.snapshot('set_focus', obj)
         obj.Focus()
-        Ranorex.Delay.Seconds(1)
+        self._settler.settle('set_focus', 1, obj, before)
         return obj.HasFocus
 
-    def take_screenshot(self, locator):
+    @_traced
+    def take_screenshot(self, locator, blob=False):
         """ Takes screenshot and return it as base64.
+        If blob is set the base64 string is kept on the server and
+        a blob handle to get it with Fetch Blob is returned instead.
         """
         if self.debug:
             log = logging.getLogger("Take Screenshot")
             log.debug("Locator: %s", locator)
-        element = self.__return_type(locator)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
-        obj = getattr(Ranorex, element)(locator)
+            log.debug("Element: %s", adapter)
+        obj = self._find(adapter, locator)
         if self.debug:
             log.debug("Application object: %s", obj)
         img = obj.CaptureCompressedImage()
-        return img.ToBase64String()
+        return self._screenshot_result(locator, img.ToBase64String(), blob)
 
-    def take_desktop_screenshot(self):
+    @_traced
+    def take_desktop_screenshot(self, blob=False):
         """ Takes screenshot of the desktop, saves it under name and return it as base64.
+        If blob is set a blob handle is returned as in Take Screenshot.
         """
         if self.debug:
             log = logging.getLogger("Take Desktop Screenshot")
             
         img = Ranorex.Host.Local.CaptureCompressedImage()
-        return img.ToBase64String()
+        return self._screenshot_result('desktop', img.ToBase64String(), blob)
+
+    def _screenshot_result(self, key, image, blob):
+        image = self._screenshots.process(key, image)
+        if _to_bool(blob) and not image.startswith(_ScreenshotDeduplicator.PREFIX):
+            return Blob(image)
+        return image
+
+    def set_screenshot_deduplication(self, enabled=True):
+        """ When enabled, screenshot identical to the previous screenshot of
+        the same element (or desktop) is returned as a short reference
+        which Embed Screenshot of the Screenshot library links to the file
+        saved before. Enable it at the start of each run.
+        """
+        self._screenshots.enabled = _to_bool(enabled)
+        self._screenshots.reset()
+        return True
 
-    def get_file_contents(self, name):
+    def get_referenced_screenshot(self, reference):
+        """ Returns base64 image which reference returned by Take Screenshot
+        stands for.
+        """
+        if self.debug:
+            log = logging.getLogger("Get Referenced Screenshot")
+            log.debug("Reference: %s", reference)
+        image = self._screenshots.resolve(reference)
+        if image is None:
+            raise AssertionError("Screenshot reference %s is not known"
+                                 % reference)
+        return image
+
+    @concurrency(PARALLEL)
+    def get_screenshot_statistics(self):
+        """ Returns deduplication hits, misses, hit rate and characters
+        of base64 not transferred.
+        """
+        return self._screenshots.statistics()
+
+    @concurrency(PARALLEL)
+    def get_file_contents(self, name, blob=False):
         """ Get the file contents
+        If blob is set the file is not read, a blob handle is returned
+        and the contents are read in chunks with Fetch Blob.
         """
         if self.debug:
             log = logging.getLogger("Get File Contents")
@@ -701,33 +1671,38 @@ class RanorexLibrary(object):
         if self.debug:
             log.debug("Filename: %s", filename)
         
+        if _to_bool(blob):
+            return FileBlob(filename)
         with open ( filename, "r") as myfile:
             content = myfile.read()
         return content
 
+    @_traced
     def uncheck(self, locator):
         """ Check if element is checked. If yes it uncheck it
         """
         if self.debug:
             log = logging.getLogger("Uncheck")
             log.debug("Locator: %s", locator)
-        element = self.__return_type(locator)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
-        if element == 'CheckBox' or element == 'RadioButton':
-            obj = getattr(Ranorex, element)(locator)
+            log.debug("Element: %s", adapter)
+        if adapter in (Ranorex.CheckBox, Ranorex.RadioButton):
+            obj = self._find(adapter, locator)
             if self.debug:
                 log.debug("Application object: %s", obj)
             if obj.Element.GetAttributeValue('Checked'):
                 if self.debug:
                     log.debug("Object is checked => unchecking")
+                before = self._settler.snapshot('uncheck', obj)
                 obj.Click()
-                Ranorex.Delay.Seconds(1)
+                self._settler.settle('uncheck', 1, obj, before)
                 return True
         else:
             raise AssertionError("Element |%s| not supported for unchecking"
-                                 % element)
+                                 % adapter.__name__)
 
+    @_traced
     def wait_for_element(self, locator, timeout=60000):
         """ Wait for element becomes on the screen.
         """
@@ -740,6 +1715,7 @@ class RanorexLibrary(object):
             return True
         raise AssertionError("Element %s does not exists" % locator)
 
+    @_traced
     def wait_for_element_attribute(self, locator, attribute,
                                    expected, timeout=60000):
         """ Wait for element attribute becomes requested value.
@@ -750,33 +1726,49 @@ class RanorexLibrary(object):
             log.debug("Attribute: %s", attribute)
             log.debug("Expected: %s", expected)
             log.debug("Timeout: %s", timeout)
-        curr_time = 0
-        timeout = int(timeout)/1000
-        while curr_time != timeout:
-            value = self.get_element_attribute(locator, attribute)
-            if str(value) == str(expected):
-                return True
-            time.sleep(5)
-            curr_time += 5
+
+        timeout = int(timeout) / 1000.0
+        path = Ranorex.Core.RxPath.Parse(locator)
+        deadline = _clock() + timeout
+
+        def has_expected_value():
+            # Search only for the remaining time, the default search
+            # timeout would block the poll far past the deadline
+            remaining = max(deadline - _clock(), 0)
+            found, element = Ranorex.Host.Local.TryFindSingle(
+                path, Ranorex.Duration(int(remaining * 1000)))
+            if not found:
+                return False
+            value = element.GetAttributeValue(attribute)
+            if self.debug:
+                log.debug("Found attribute value is: %s", value)
+            return str(value) == str(expected)
+
+        if self._poller.poll('element_attribute', has_expected_value,
+                             timeout):
+            return True
         raise AssertionError("Object at location %s could not be found"
                              % locator)
 
+    @_traced
     def make_visible(self, locator):
         """ Make the element visible
         """
         if self.debug:
             log = logging.getLogger("Make Visible")
             log.debug("Locator: %s", locator)
-        element = self.__return_type(locator)
+        adapter = self.__return_type(locator)
         if self.debug:
-            log.debug("Element: %s", element)
-        obj = getattr(Ranorex, element)(locator)
+            log.debug("Element: %s", adapter)
+        obj = self._find(adapter, locator)
         if self.debug:
             log.debug("Application object: %s", obj)
+        before = self._settler.snapshot('make_visible', obj)
         obj.EnsureVisible()
-        Ranorex.Delay.Seconds(1)
+        self._settler.settle('make_visible', 1, obj, before)
         return True
 
+    @concurrency(PARALLEL)
     def wait_for_process_to_start(self, process_name, timeout):
         """ Waits for /timeout/ seconds for process to start.
         """
@@ -784,17 +1776,11 @@ class RanorexLibrary(object):
             log = logging.getLogger("Wait For Process To Start")
             log.debug("Process name: %s", process_name)
             log.debug("Timeout: %s", timeout)
-        curr_time = 0
-        timeout = int(timeout)/1000
-        while curr_time <= timeout:
-            proc = subprocess.Popen(['tasklist'], stdout=subprocess.PIPE)
-            out = proc.communicate()[0]
-            res = out.find(process_name) != -1 if out else False
-            if res:
-                return True
-            else:
-                curr_time += 5
-                time.sleep(5)
+        timeout = int(timeout) / 1000.0
+        if self._poller.poll('process_start',
+                             lambda: self.check_if_process_is_running(process_name),
+                             timeout):
+            return True
         raise AssertionError("Process %s not found within %ss" % (process_name,
                                                                   timeout))
 
@@ -809,9 +1795,13 @@ class RanorexLibrary(object):
             log.debug("Process is running: %s", res)
         if not res:
             raise AssertionError("Process %s is not running" % process_name)
-        proc = subprocess.Popen(['taskkill', '/im', process_name, '/f'],
-                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        out = proc.communicate()
+        try:
+            proc = subprocess.Popen(['taskkill', '/im', process_name, '/f'],
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE)
+            out = proc.communicate()
+        finally:
+            self._processes_changed()
         if 'SUCCESS' in out[0]:
             if self.debug:
                 log.debug("Output of killing: %s", out)
@@ -835,13 +1825,25 @@ def main():
     parser = ArgumentParser(prog="rxconnector", description="Remote ranorex library for robot framework")
     parser.add_argument("-i","--ip", required=False, dest="ip", default="0.0.0.0")
     parser.add_argument("-p", "--port", required=False, type=int, dest="port", default=11000)
+    parser.add_argument("-t", "--threads", required=False, type=int, dest="threads", default=0)
+    parser.add_argument("-k", "--keep-alive", required=False, type=float, dest="keep_alive", default=None)
+    parser.add_argument("-m", "--max-connections", required=False, type=int, dest="max_connections", default=None)
+    parser.add_argument("-s", "--spec-file", required=False, dest="spec_file", default=None)
+    parser.add_argument("--metrics-file", required=False, dest="metrics_file", default=None)
+    parser.add_argument("--metrics-path", required=False, dest="metrics_path", default=None)
 
     # parse arguments
     args = parser.parse_args()
 
     # run server
     try:
-        server = RobotRemoteServer(RanorexLibrary(), args.ip, args.port)
+        server = RobotRemoteServer(RanorexLibrary(), args.ip, args.port,
+                                   threads=args.threads,
+                                   keep_alive=args.keep_alive,
+                                   max_connections=args.max_connections,
+                                   spec_file=args.spec_file,
+                                   metrics_file=args.metrics_file,
+                                   metrics_path=args.metrics_path)
     except KeyboardInterrupt, e:
         log("INFO: Keyboard Iterrupt: stopping server")
         server.stop_remote_server()
@@ -0,0 +1,210 @@
+"""
+    RanoreXPath tokenizer and parser used by the remote ranorex library.
+    Locators are parsed in a single pass into a small immutable tree
+    which tells which element the locator targets.
+"""
+from collections import namedtuple, OrderedDict
+import threading
+import re
+
+_NAME = re.compile(r'\.\.|\.|\*|\?|[\w\-]+', re.UNICODE)
+
+# axes which are written with a separator only in the canonical form
+_IMPLICIT_AXES = ('child', 'descendant')
+
+Step = namedtuple('Step', ['axis', 'name', 'predicates'])
+Locator = namedtuple('Locator', ['absolute', 'steps', 'target', 'canonical'])
+
+
+class LRUCache(object):
+    """ Bounded least recently used cache with hit/miss counters.
+    Safe to share between threads.
+    """
+    def __init__(self, size=1024):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def statistics(self):
+        with self._lock:
+            return {'size': len(self._entries), 'capacity': self.size,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+_PARSE_CACHE = LRUCache(1024)
+
+
+def parse(xpath):
+    """ Returns parsed Locator for xpath. Results are cached per
+    locator string.
+    """
+    locator = _PARSE_CACHE.get(xpath)
+    if locator is None:
+        locator = _parse(xpath)
+        _PARSE_CACHE.put(xpath, locator)
+    return locator
+
+
+def parse_statistics():
+    return _PARSE_CACHE.statistics()
+
+
+def tokenize(xpath):
+    """ Splits xpath into (kind, value) tokens. Kind is one of
+    '/', '//', 'axis', 'name' and '['. Predicate tokens hold the
+    normalized text between the outermost brackets.
+    """
+    tokens = []
+    index = 0
+    length = len(xpath)
+    while index < length:
+        char = xpath[index]
+        if char == '/':
+            if xpath.startswith('//', index):
+                tokens.append(('//', '//'))
+                index += 2
+            else:
+                tokens.append(('/', '/'))
+                index += 1
+        elif char == '[':
+            predicate, index = _read_predicate(xpath, index)
+            tokens.append(('[', predicate))
+        elif char.isspace():
+            index += 1
+        else:
+            match = _NAME.match(xpath, index)
+            if not match:
+                raise AssertionError("Unexpected character '%s' at position %d "
+                                     "in locator %s" % (char, index, xpath))
+            index = match.end()
+            if xpath.startswith('::', index):
+                tokens.append(('axis', match.group(0).lower()))
+                index += 2
+            else:
+                tokens.append(('name', match.group(0)))
+    return tokens
+
+
+def _read_predicate(xpath, start):
+    """ Reads predicate starting at '[' and returns its content with
+    whitespace outside of string literals collapsed, together with
+    the index following the closing bracket.
+    """
+    chars = []
+    depth = 0
+    quote = None
+    index = start
+    length = len(xpath)
+    while index < length:
+        char = xpath[index]
+        index += 1
+        if quote:
+            chars.append(char)
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+            chars.append(char)
+        elif char == '[':
+            depth += 1
+            if depth > 1:
+                chars.append(char)
+        elif char == ']':
+            depth -= 1
+            if depth == 0:
+                return ''.join(chars).strip(), index
+            chars.append(char)
+        elif char.isspace():
+            if chars and chars[-1] != ' ':
+                chars.append(' ')
+        else:
+            chars.append(char)
+    raise AssertionError("Unterminated predicate at position %d in locator %s"
+                         % (start, xpath))
+
+
+def _parse(xpath):
+    tokens = tokenize(xpath)
+    steps = []
+    absolute = bool(tokens) and tokens[0][0] in ('/', '//')
+    axis = 'child'
+    explicit_axis = None
+    for kind, value in tokens:
+        if kind in ('/', '//'):
+            axis = 'descendant' if kind == '//' else 'child'
+            explicit_axis = None
+        elif kind == 'axis':
+            explicit_axis = value
+        elif kind == 'name':
+            if value == '..':
+                step_axis = 'parent'
+            elif value == '.':
+                step_axis = 'self'
+            else:
+                step_axis = explicit_axis or axis
+            steps.append(Step(step_axis, value, ()))
+            axis = 'child'
+            explicit_axis = None
+        else:
+            if not steps:
+                raise AssertionError("Predicate without element in locator %s"
+                                     % xpath)
+            last = steps[-1]
+            steps[-1] = last._replace(predicates=last.predicates + (value,))
+    steps = tuple(steps)
+    return Locator(absolute, steps, _target(steps, xpath),
+                   _canonical(absolute, steps))
+
+
+def _target(steps, xpath):
+    """ Follows parent hops and returns name of the targeted element
+    """
+    names = []
+    for step in steps:
+        if step.name == '..':
+            if not names:
+                raise AssertionError("Locator %s goes above its root" % xpath)
+            names.pop()
+        elif step.name != '.':
+            names.append(step.name)
+    return names[-1] if names else ''
+
+
+def _canonical(absolute, steps):
+    parts = []
+    for position, step in enumerate(steps):
+        if step.axis == 'descendant':
+            parts.append('//')
+        elif position or absolute:
+            parts.append('/')
+        if step.name in ('.', '..') or step.axis in _IMPLICIT_AXES:
+            parts.append(step.name.lower())
+        else:
+            parts.append('%s::%s' % (step.axis, step.name.lower()))
+        for predicate in step.predicates:
+            parts.append('[%s]' % predicate)
+    return ''.join(parts)
@@ -0,0 +1,105 @@
+"""
+    Process inventory used by the remote ranorex library.
+    Running processes are listed by a backend and kept in a short lived
+    snapshot keyed by image name, so repeated checks do not enumerate
+    processes again.
+"""
+import subprocess
+import threading
+import time
+import csv
+
+
+def image_key(name):
+    """ Normalizes image name so 'Notepad.EXE' and 'notepad' are the
+    same process, but 'note' is not 'notepad.exe'.
+    """
+    name = name.strip().lower()
+    if name.endswith('.exe'):
+        name = name[:-4]
+    return name
+
+
+class DotNetBackend(object):
+    """ Enumerates processes natively with System.Diagnostics.Process
+    """
+    name = 'dotnet'
+
+    def __init__(self):
+        from System.Diagnostics import Process
+        self._process = Process
+
+    def image_names(self):
+        names = []
+        for process in self._process.GetProcesses():
+            try:
+                names.append(process.ProcessName)
+            finally:
+                process.Dispose()
+        return names
+
+
+class TasklistBackend(object):
+    """ Parses output of 'tasklist /fo csv /nh'
+    """
+    name = 'tasklist'
+
+    def image_names(self):
+        proc = subprocess.Popen(['tasklist', '/fo', 'csv', '/nh'],
+                                stdout=subprocess.PIPE)
+        out = proc.communicate()[0]
+        return [row[0] for row in csv.reader(out.splitlines()) if row]
+
+
+def default_backend():
+    try:
+        return DotNetBackend()
+    except ImportError:
+        return TasklistBackend()
+
+
+class ProcessInventory(object):
+    """ Snapshot of running processes which is refreshed from backend
+    when it is older than ttl seconds. Safe to share between threads.
+    """
+    def __init__(self, backend=None, ttl=0.5, clock=time.time):
+        self.backend = backend or default_backend()
+        self.ttl = ttl
+        self._clock = clock
+        self._snapshot = None
+        self._taken = 0
+        self.hits = 0
+        self.refreshes = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """ Returns dictionary of image name key -> number of processes
+        """
+        with self._lock:
+            now = self._clock()
+            if self._snapshot is None or now - self._taken > self.ttl:
+                snapshot = {}
+                for name in self.backend.image_names():
+                    key = image_key(name)
+                    snapshot[key] = snapshot.get(key, 0) + 1
+                self._snapshot = snapshot
+                self._taken = now
+                self.refreshes += 1
+            else:
+                self.hits += 1
+            return self._snapshot
+
+    def count(self, name):
+        return self.snapshot().get(image_key(name), 0)
+
+    def is_running(self, name):
+        return self.count(name) > 0
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def statistics(self):
+        with self._lock:
+            return {'backend': self.backend.name, 'ttl': self.ttl,
+                    'hits': self.hits, 'refreshes': self.refreshes}
@@ -0,0 +1,134 @@
+"""
+    Table reading engine used by the remote ranorex library.
+    Rows are read lazily and only requested rows and columns are
+    touched, each access to the adapter is a cross process call.
+"""
+import csv
+
+MODES = ('cells', 'rows', 'clipboard')
+
+
+def has_names(columns):
+    """ Tells if columns refer to any column by header name
+    """
+    return any(not index.isdigit() for index in _split(columns))
+
+
+def parse_columns(columns, headers=None):
+    """ Returns list of column indexes for comma separated indexes or
+    header names, None selects all columns.
+    """
+    if columns in (None, '', '*'):
+        return None
+    keys = [header.strip().lower() for header in headers or []]
+    indexes = []
+    for column in _split(columns):
+        if column.isdigit():
+            indexes.append(int(column))
+        elif column.lower() in keys:
+            indexes.append(keys.index(column.lower()))
+        else:
+            raise AssertionError("Table has no column '%s'" % column)
+    return indexes
+
+
+def _split(columns):
+    if columns in (None, '', '*'):
+        return []
+    if isinstance(columns, basestring):
+        columns = columns.split(',')
+    return [unicode(column).strip() for column in columns]
+
+
+def project(values, columns):
+    if columns is None:
+        return list(values)
+    return [values[index] if index < len(values) else '' for index in columns]
+
+
+def parse_clipboard(text):
+    """ Splits tab separated text copied from a table into rows
+    """
+    lines = text.encode('utf-8').splitlines()
+    return [[value.decode('utf-8') for value in row]
+            for row in csv.reader(lines, delimiter='\t') if row]
+
+
+class TableReader(object):
+    """ Reads rows of table adapter as lists of texts.
+
+    In 'cells' mode each projected cell text is read separately. In
+    'rows' mode the value of the row is read with one call and split
+    with separator, rows which do not split into as many values as the
+    row has cells are read by cells. Number of adapter accesses is
+    counted in calls.
+
+    Rows are listed with one access to Rows, which makes ranorex create
+    adapters for all rows of the table. Cells are read only from the
+    selected rows.
+    """
+    def __init__(self, table, mode='cells', columns=None, offset=0,
+                 limit=None, separator=';'):
+        if mode not in MODES:
+            raise AssertionError("Unknown table mode '%s', use one of %s"
+                                 % (mode, ', '.join(MODES)))
+        self._table = table
+        self.mode = mode
+        self.columns = columns
+        self.offset = offset
+        self.limit = limit
+        self.separator = separator
+        self._width = None
+        self.calls = 0
+
+    def rows(self):
+        """ Generator of selected rows
+        """
+        rows = self._table.Rows
+        self.calls += 1
+        stop = len(rows)
+        if self.limit is not None:
+            stop = min(stop, self.offset + self.limit)
+        for index in xrange(self.offset, stop):
+            yield self._read_row(rows[index])
+
+    def select(self, rows):
+        """ Applies offset, limit and columns to already read rows
+        """
+        stop = None if self.limit is None else self.offset + self.limit
+        return [project(row, self.columns) for row in rows[self.offset:stop]]
+
+    def _read_row(self, row):
+        if self.mode == 'rows':
+            values = self._row_values(row)
+            if values is not None:
+                return project(values, self.columns)
+        cells = row.Cells
+        self.calls += 1
+        if self.columns is None:
+            values = []
+            for cell in cells:
+                values.append(cell.Text)
+                self.calls += 1
+            return values
+        values = []
+        for index in self.columns:
+            if index < len(cells):
+                values.append(cells[index].Text)
+                self.calls += 1
+            else:
+                values.append('')
+        return values
+
+    def _row_values(self, row):
+        value = row.Element.GetAttributeValue('Value')
+        self.calls += 1
+        if value is None:
+            return None
+        if self._width is None:
+            self._width = len(row.Cells)
+            self.calls += 1
+        values = unicode(value).split(self.separator)
+        if len(values) != self._width:
+            return None
+        return ['' if value == '(null)' else value for value in values]
@@ -0,0 +1,134 @@
+"""
+    Keyword tracing used by the remote ranorex library.
+    UI keywords and their phases are recorded as spans which can be
+    exported as Chrome trace events.
+"""
+from collections import deque
+import threading
+import time
+import os
+
+
+class Span(object):
+    """ Times a with block and records it to the tracer
+    """
+    def __init__(self, tracer, name, category, args=None):
+        self._tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = self._tracer.clock()
+        self._tracer._start(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self._tracer._finish(self, self._tracer.clock(), exc_type is not None)
+        return False
+
+
+class _NoSpan(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Tracer(object):
+    """ Records how long UI keywords and their phases (resolve, find,
+    wait, settle) take as spans in a bounded ring buffer. The time from
+    the end of the last phase to settling, or to the end of the keyword,
+    is recorded as the act phase.
+    """
+    def __init__(self, size=10000, clock=time.time):
+        self.enabled = True
+        self.clock = clock
+        self._spans = deque(maxlen=size)
+        self._local = threading.local()
+
+    def keyword(self, name, args=()):
+        if not self.enabled:
+            return _NO_SPAN
+        return Span(self, name, 'keyword', args)
+
+    def span(self, name):
+        if not self.enabled:
+            return _NO_SPAN
+        return Span(self, name, 'phase')
+
+    def _start(self, span):
+        keyword = getattr(self._local, 'keyword', None)
+        if span.category == 'keyword':
+            span.parent = keyword
+            span.last_end = span.start
+            span.acted = False
+            self._local.keyword = span
+        elif span.name == 'settle' and keyword is not None \
+                and not keyword.acted:
+            self._act(keyword, span.start)
+
+    def _finish(self, span, end, failed):
+        keyword = getattr(self._local, 'keyword', None)
+        if span.category == 'keyword':
+            if not span.acted:
+                self._act(span, end)
+            self._local.keyword = span.parent
+        elif keyword is not None:
+            keyword.last_end = end
+        self._record(span.name, span.category, span.start, end - span.start,
+                     failed, span.args)
+
+    def _act(self, keyword, now):
+        keyword.acted = True
+        self._record('act', 'phase', keyword.last_end,
+                     now - keyword.last_end, False, None)
+
+    def _record(self, name, category, start, duration, failed, args):
+        self._spans.append((name, category, start, duration,
+                            threading.current_thread().ident, failed, args))
+
+    def resize(self, size):
+        self._spans = deque(self._spans, maxlen=size)
+
+    def clear(self):
+        self._spans.clear()
+
+    def chrome_trace(self):
+        """ Returns spans as Chrome trace event format dictionary
+        """
+        pid = os.getpid()
+        events = []
+        for name, category, start, duration, thread, failed, args \
+                in list(self._spans):
+            event = {'name': name, 'cat': category, 'ph': 'X', 'pid': pid,
+                     'tid': thread, 'ts': round(start * 1e6, 1),
+                     'dur': round(duration * 1e6, 1)}
+            if args:
+                event['args'] = {'locator': unicode(args[0])[:200]}
+            if failed:
+                event.setdefault('args', {})['failed'] = True
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def traced(tracer):
+    """ Returns decorator recording calls of keywords to tracer as spans.
+    Remote server reads arguments of the keyword from robot_wrapped.
+    """
+    def decorator(keyword):
+        name = keyword.__name__
+        def wrapper(self, *args, **kwargs):
+            with tracer.keyword(name, args[:1]):
+                return keyword(self, *args, **kwargs)
+        wrapper.__name__ = name
+        wrapper.__doc__ = keyword.__doc__
+        wrapper.__dict__.update(keyword.__dict__)
+        wrapper.robot_wrapped = keyword
+        return wrapper
+    return decorator
@@ -0,0 +1,83 @@
+"""
+    Lazy element tree enumeration used by the remote ranorex library.
+    Simple relative locators like 'listitem' or './/listitem' are
+    evaluated by walking children of the element one level at a time,
+    so matches can be counted or paged without building all of them.
+"""
+from itertools import islice
+import rxpath
+
+_AXES = ('child', 'descendant', 'self')
+
+
+def simple_steps(locator):
+    """ Returns steps of relative locator which can be walked without
+    ranorex, None if the locator needs predicates or other axes. Several
+    descendant steps are left to ranorex too, nested matches of the first
+    would yield the same nodes more than once.
+    """
+    parsed = rxpath.parse(locator)
+    if parsed.absolute:
+        return None
+    for step in parsed.steps:
+        if step.predicates or step.axis not in _AXES or step.name == '..':
+            return None
+    if [step.axis for step in parsed.steps].count('descendant') > 1:
+        return None
+    return parsed.steps
+
+
+def select(root, steps, names_of, max_depth=None):
+    """ Lazily yields nodes under root matching steps in document order.
+    Node children are read from Children and names_of returns the
+    lowercase names a node matches, like the roles and capabilities of
+    a ranorex element. Descendant steps go at most max_depth levels down.
+    """
+    nodes = iter([root])
+    for step in steps:
+        nodes = _expand(nodes, step, names_of, max_depth)
+    return nodes
+
+
+def _expand(nodes, step, names_of, max_depth):
+    name = step.name.lower()
+    for node in nodes:
+        if step.axis == 'self':
+            candidates = [node]
+        elif step.axis == 'child':
+            candidates = node.Children
+        else:
+            candidates = descendants(node, max_depth)
+        for candidate in candidates:
+            if name in ('*', '.') or name in names_of(candidate):
+                yield candidate
+
+
+def descendants(root, max_depth=None):
+    """ Yields descendants of root depth first in document order
+    """
+    stack = [(iter(root.Children), 1)]
+    while stack:
+        children, depth = stack[-1]
+        for child in children:
+            yield child
+            if max_depth is None or depth < max_depth:
+                stack.append((iter(child.Children), depth + 1))
+            break
+        else:
+            stack.pop()
+
+
+def page(nodes, offset=0, limit=None):
+    """ Returns iterator over nodes skipping offset and stopping after
+    limit nodes
+    """
+    stop = None if limit is None else offset + limit
+    return islice(nodes, offset, stop)
+
+
+def count(nodes):
+    total = 0
+    for _ in nodes:
+        total += 1
+    return total
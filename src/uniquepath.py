@@ -0,0 +1,78 @@
+"""Allocation of unique numbered file names like ``screenshot_12.jpg``.
+
+Each directory is scanned once for the highest used index, after that
+indices are handed out from memory. Files are created exclusively so
+several processes writing into the same directory never get the same name.
+"""
+import errno
+import os
+import re
+import threading
+
+_lock = threading.Lock()
+_next_index = {}
+
+
+def allocate(directory, basename, ext):
+    """Creates an empty file ``<basename>_<index><ext>`` in ``directory``
+    and returns its path. ``basename`` may contain a path of its own.
+
+    If the directory does not exist, the first path is returned without
+    creating anything so that callers can report the missing directory.
+    """
+    directory, basename = os.path.split(os.path.join(directory, basename))
+    if not os.path.isdir(directory):
+        return _path(directory, basename, 1, ext)
+    key = (os.path.normcase(os.path.abspath(directory)), basename, ext)
+    _lock.acquire()
+    try:
+        index = _next_index.get(key)
+        if index is None:
+            index = _highest_index(directory, basename, ext) + 1
+        while True:
+            path = _path(directory, basename, index, ext)
+            if _create_exclusively(path):
+                _next_index[key] = index + 1
+                return path
+            index += 1
+    finally:
+        _lock.release()
+
+
+def forget(directory=None):
+    """Forgets indices of ``directory`` or of all directories."""
+    _lock.acquire()
+    try:
+        if directory is None:
+            _next_index.clear()
+            return
+        directory = os.path.normcase(os.path.abspath(directory))
+        for key in [key for key in _next_index if key[0] == directory]:
+            del _next_index[key]
+    finally:
+        _lock.release()
+
+
+def _path(directory, basename, index, ext):
+    return os.path.join(directory, "%s_%d%s" % (basename, index, ext))
+
+
+def _highest_index(directory, basename, ext):
+    pattern = re.compile(r'^%s_(\d+)%s$' % (re.escape(basename), re.escape(ext)))
+    highest = 0
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            highest = max(highest, int(match.group(1)))
+    return highest
+
+
+def _create_exclusively(path):
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except OSError, err:
+        if err.errno != errno.EEXIST:
+            raise
+        return False
+    os.close(fd)
+    return True
@@ -0,0 +1,63 @@
+"""Compares resolving the log directory from a copy of all variables,
+as Screenshot and RealtimeUtils used to on every access, to reading the
+two variables once per suite with logdir.LogDirCache.
+
+BuiltIn is replaced with a variable scope of the given size so that the
+benchmark can run outside of a Robot Framework execution. Requires Robot
+Framework to import logdir.
+
+Run with: python test/bench_logdir.py [rounds] [variables]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+import logdir
+
+
+class FakeBuiltIn(object):
+    variables = {}
+
+    def get_variables(self):
+        return dict(self.variables)
+
+    def get_variable_value(self, name):
+        return self.variables[name]
+
+
+def copied_log_dir():
+    variables = FakeBuiltIn().get_variables()
+    outdir = variables['${OUTPUTDIR}']
+    log = variables['${LOGFILE}']
+    log = os.path.dirname(log) if log != 'NONE' else '.'
+    return os.path.normpath(os.path.join(outdir, log))
+
+
+class Library(logdir.LogDirCache):
+    pass
+
+
+def main(rounds=20000, variables=500):
+    FakeBuiltIn.variables = dict(('${VAR%d}' % index, index)
+                                 for index in range(variables))
+    FakeBuiltIn.variables.update({'${OUTPUTDIR}': '/tmp/out',
+                                  '${LOGFILE}': '/tmp/out/log.html'})
+    logdir.BuiltIn = FakeBuiltIn
+    library = Library()
+
+    def per_suite():
+        library._start_suite('suite', {})
+        return library._log_dir
+
+    print '%-28s %10s' % ('access', 'us/access')
+    for name, function in [('copy of all variables', copied_log_dir),
+                           ('resolved on every suite', per_suite),
+                           ('cached', lambda: library._log_dir)]:
+        elapsed = timeit.timeit(function, number=rounds)
+        print '%-28s %10.2f' % (name, elapsed * 1e6 / rounds)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,62 @@
+"""Compares rxpath.parse to the split('/') heuristic it replaced.
+
+Run with: python test/bench_rxpath.py [rounds]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+import rxpath
+
+CORPUS = [
+    "/form[@processname='charmap']/?/?/button[@accessiblename='Close']",
+    "/form[@processname='charmap']/titlebar[@accessiblerole='TitleBar']",
+    "/form[@processname='charmap']/text[@controlid='104']",
+    "/form[@processname='charmap']/combobox[@controlid='105']",
+    "/form[@processname='charmap']/checkbox[@accessiblekeyboardshortcut='Alt+v']",
+    "/form[@processname='notepad']/text[@text~'test.txt']",
+    "/form[@processname='notepad']",
+    "/form[@title='Orders']/table/row/cell[@text='${ActiveForm}']/..",
+    "/form[@title='Orders']//text[@caption='some / random string']",
+    "/form[@title='Orders']//row[cell[@text='42']]/cell[@columnindex='3']",
+    "/dom[@domain='example.com']//div[#'main']/table/tbody/tr[2]/td[1]/a",
+    "/form[@title='Orders']/table/row[@index='7']/cell[@text='x']/../..",
+]
+
+
+def extract_element(xpath):
+    # the heuristic used before rxpath
+    split_locator = xpath.split('/')
+    if "[" in split_locator[-1]:
+        return split_locator[-1].split('[')[0]
+    elif "[" in split_locator[-2] and "]" in split_locator[-1]:
+        return split_locator[-2].split('[')[0]
+    elif ".." in split_locator[-1]:
+        return split_locator[-3]
+    return split_locator[-1]
+
+
+def uncached_parse(xpath):
+    return rxpath._parse(xpath)
+
+
+def main(rounds=2000):
+    print '%-26s %10s' % ('function', 'us/locator')
+    for name, function in [('split heuristic', extract_element),
+                           ('rxpath._parse (uncached)', uncached_parse),
+                           ('rxpath.parse (cached)', rxpath.parse)]:
+        elapsed = timeit.timeit(lambda: [function(x) for x in CORPUS],
+                                number=rounds)
+        print '%-26s %10.2f' % (name, elapsed * 1e6 / (rounds * len(CORPUS)))
+    print
+    print 'Locators where the heuristic differs from the parser:'
+    for xpath in CORPUS:
+        old, new = extract_element(xpath), rxpath.parse(xpath).target
+        if old != new:
+            print '  %s\n    heuristic: %r  parser: %r' % (xpath, old, new)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
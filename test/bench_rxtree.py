@@ -0,0 +1,62 @@
+"""Compares counting and paging list items by walking a stub tree of
+100k nodes lazily to building the list of all matching items first,
+as Find does.
+
+Run with: python test/bench_rxtree.py [nodes] [rounds]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+import rxtree
+
+NAMES = {'list': set(['list']), 'group': set(['container']),
+         'item': set(['listitem'])}
+
+
+class Node(object):
+
+    __slots__ = ('kind', 'Children')
+
+    def __init__(self, kind, children=()):
+        self.kind = kind
+        self.Children = children
+
+
+def build(nodes):
+    # groups of 99 items, like a grouped list view
+    groups = []
+    for _ in range(nodes // 100):
+        groups.append(Node('group', [Node('item') for _ in range(99)]))
+    return Node('list', groups)
+
+
+def names_of(node):
+    return NAMES[node.kind]
+
+
+def main(nodes=100000, rounds=5):
+    root = build(nodes)
+    steps = rxtree.simple_steps('.//listitem')
+
+    def find_all():
+        return list(rxtree.select(root, steps, names_of))
+
+    cases = [
+        ('count, list all first', lambda: len(find_all())),
+        ('count, lazy walk', lambda: rxtree.count(rxtree.select(root, steps,
+                                                               names_of))),
+        ('page 50, list all first', lambda: find_all()[100:150]),
+        ('page 50, lazy walk', lambda: list(rxtree.page(
+            rxtree.select(root, steps, names_of), 100, 50))),
+    ]
+    print '%-26s %10s' % ('operation', 'ms')
+    for name, function in cases:
+        elapsed = timeit.timeit(function, number=rounds)
+        print '%-26s %10.2f' % (name, elapsed * 1000 / rounds)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
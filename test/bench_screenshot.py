@@ -0,0 +1,68 @@
+"""Compares writing screenshots in the foreground to background writers.
+
+Encoding is simulated by a taker which sleeps, so the results show how
+long keywords are blocked and not the speed of the image modules.
+Requires Robot Framework to import the Screenshot library.
+
+Run with: python test/bench_screenshot.py [screenshots] [encode_ms]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+from Screenshot import _ScreenshotWriter
+
+
+class SleepingTaker(object):
+
+    def __init__(self, encode_time):
+        self.encode_time = encode_time
+
+    def capture(self, region=None):
+        return 'image'
+
+    def save(self, image, path, **options):
+        time.sleep(self.encode_time)
+        with open(path, 'wb') as f:
+            f.write(image)
+
+
+def run(taker, directory, count, workers):
+    paths = [os.path.join(directory, 'screenshot_%d.jpg' % index)
+             for index in range(count)]
+    writer = _ScreenshotWriter(taker, workers, 8) if workers else None
+    start = time.time()
+    blocked = 0.0
+    for path in paths:
+        before = time.time()
+        if writer:
+            writer.submit(taker.capture(), path, {})
+        else:
+            taker.save(taker.capture(), path)
+        blocked += time.time() - before
+    if writer:
+        writer.stop()
+    return blocked / count, time.time() - start
+
+
+def main(count=50, encode_ms=20):
+    taker = SleepingTaker(encode_ms / 1000.0)
+    directory = tempfile.mkdtemp()
+    threads = threading.active_count()
+    try:
+        print '%-8s %14s %10s' % ('writers', 'blocked/shot', 'total')
+        for workers in (0, 1, 2, 4):
+            blocked, total = run(taker, directory, count, workers)
+            print '%-8d %12.2fms %9.3fs' % (workers, blocked * 1000, total)
+    finally:
+        shutil.rmtree(directory)
+    print 'threads left running: %d' % (threading.active_count() - threads)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'site-packages'))
+import robotremoteserver
+
+
+class TestBlobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = robotremoteserver._BlobStore(budget=16, ttl=600)
+        self.text = u'\xe4\xf6\xfc abc €' * 2
+
+    def tearDown(self):
+        self.store.clear()
+
+    def _fetch_all(self, handle, size):
+        chunks = []
+        offset = 0
+        while True:
+            chunk = self.store.read(handle, offset, size)
+            if not chunk:
+                return ''.join(chunks)
+            chunks.append(chunk)
+            offset += len(chunk)
+
+    def test_offsets_count_bytes_in_memory_and_spilled(self):
+        small = self.store.put(robotremoteserver.Blob(u'\xe4\xf6'))
+        large = self.store.put(robotremoteserver.Blob(self.text))
+        self.assertEqual(small['size'], 4)
+        self.assertEqual(large['size'], len(self.text.encode('UTF-8')))
+        self.assertEqual(self.store.read(small['blob'], 2, 2), '\xc3\xb6')
+        self.assertEqual(self._fetch_all(large['blob'], 3).decode('UTF-8'),
+                         self.text)
+
+    def test_spilled_blob_does_not_use_memory_budget(self):
+        self.store.put(robotremoteserver.Blob(self.text))
+        small = self.store.put(robotremoteserver.Blob('x' * 16))
+        self.assertEqual(self.store._blobs[small['blob']].path, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'site-packages'))
+import robotremoteserver
+
+
+class TestKeywordMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = robotremoteserver._KeywordMetrics()
+        self.metrics.record('Click Element', 0.01)
+        self.metrics.record('Click Element', 0.2, failed=True)
+        self.metrics.record('Say "Hi"', 0.001)
+
+    def _families(self, text):
+        families = []
+        for line in text.splitlines():
+            if line.startswith('# TYPE '):
+                families.append((line.split()[2], []))
+            else:
+                families[-1][1].append(line.split('{')[0])
+        return families
+
+    def test_samples_are_grouped_after_their_type_line(self):
+        families = self._families(self.metrics.to_prometheus())
+        self.assertEqual([name for name, _ in families],
+                         ['robot_keyword_calls_total',
+                          'robot_keyword_errors_total',
+                          'robot_keyword_duration_seconds'])
+        for name, samples in families:
+            self.assertTrue(samples)
+            for sample in samples:
+                self.assertTrue(sample.startswith(name), sample)
+
+    def test_counts_and_escaping(self):
+        text = self.metrics.to_prometheus()
+        self.assertTrue('robot_keyword_calls_total{keyword="Click Element"} 2'
+                        in text)
+        self.assertTrue('robot_keyword_errors_total{keyword="Click Element"} 1'
+                        in text)
+        self.assertTrue('robot_keyword_calls_total{keyword="Say \\"Hi\\""} 1'
+                        in text)
+        self.assertTrue('robot_keyword_duration_seconds_bucket'
+                        '{keyword="Click Element",le="+Inf"} 2' in text)
+
+    def test_timer_is_monotonic_across_threads(self):
+        results = []
+
+        def measure():
+            values = [robotremoteserver._timer() for _ in range(1000)]
+            results.append(values == sorted(values))
+        threads = [threading.Thread(target=measure) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [True] * 4)
+
+
+class MetricsServer(robotremoteserver.RobotRemoteServer):
+
+    def __init__(self):
+        self._metrics = robotremoteserver._KeywordMetrics()
+
+
+class TestWriteMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'metrics.prom')
+        self.server = MetricsServer()
+        self.server._metrics.record('Keyword', 0.5)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_replaces_file_without_leaving_temporary_files(self):
+        self.server.write_metrics(self.path)
+        self.server._metrics.record('Keyword', 0.5)
+        self.server.write_metrics(self.path)
+        self.assertEqual(os.listdir(self.directory), ['metrics.prom'])
+        with open(self.path) as mf:
+            self.assertTrue('robot_keyword_calls_total{keyword="Keyword"} 2'
+                            in mf.read())
+
+    def test_concurrent_writers_do_not_collide(self):
+        errors = []
+
+        def write():
+            try:
+                for _ in range(20):
+                    self.server.write_metrics(self.path)
+            except Exception, err:
+                errors.append(err)
+        threads = [threading.Thread(target=write) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.directory), ['metrics.prom'])
+
+
+if __name__ == '__main__':
+    unittest.main()
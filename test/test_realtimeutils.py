@@ -0,0 +1,181 @@
+import BaseHTTPServer
+import gzip
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+try:
+    import logdir
+    import RealtimeUtils
+except ImportError:    # Robot Framework is not installed
+    RealtimeUtils = None
+
+# longer than RealtimeUtils.CHUNK_SIZE so logs are read in several chunks
+LOG = ''.join('%06d log line\n' % index for index in range(12000))
+
+
+class FakeBuiltIn(object):
+    variables = {}
+
+    def get_variable_value(self, name):
+        return self.variables[name]
+
+
+class LogHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Serves LOG, honouring Range header only if server.ranges is set
+    """
+    def do_GET(self):
+        self.server.requests.append(self.headers.get('Range'))
+        match = re.match(r'bytes=(\d*)-(\d*)$', self.headers.get('Range') or '')
+        if self.server.ranges and match:
+            first, last = match.groups()
+            if not first:
+                body = LOG[-int(last):]
+            else:
+                body = LOG[int(first):int(last) + 1 if last else None]
+            self.send_response(206)
+        else:
+            body = LOG
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(ranges):
+    server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), LogHandler)
+    server.ranges = ranges
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+@unittest.skipIf(RealtimeUtils is None, 'requires Robot Framework')
+class _EmbedLogFile(object):
+    ranges = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = start_server(cls.ranges)
+        cls.url = 'http://127.0.0.1:%d/log.txt' % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        FakeBuiltIn.variables = {
+            '${OUTPUTDIR}': self.directory,
+            '${LOGFILE}': os.path.join(self.directory, 'log.html')}
+        self._builtin = logdir.BuiltIn
+        logdir.BuiltIn = FakeBuiltIn
+        self.library = RealtimeUtils.RealtimeUtils()
+        del self.server.requests[:]
+
+    def tearDown(self):
+        logdir.BuiltIn = self._builtin
+        shutil.rmtree(self.directory)
+
+    def embedded(self, path, name='realtime'):
+        self.assertEqual(os.path.dirname(path), self.directory)
+        if path.endswith('.gz'):
+            gz = gzip.open(path, 'rb')
+            try:
+                return gz.read()
+            finally:
+                gz.close()
+        zf = zipfile.ZipFile(path)
+        try:
+            self.assertEqual(zf.namelist(), [name + '.log'])
+            self.assertEqual(zf.testzip(), None)
+            return zf.read(name + '.log')
+        finally:
+            zf.close()
+
+    def test_whole_log(self):
+        path = self.library.embed_log_file(self.url, 'server')
+        self.assertTrue(path.endswith('server_1.zip'))
+        self.assertEqual(self.embedded(path, 'server'), LOG)
+        self.assertEqual(self.server.requests, [None])
+
+    def test_offset_and_size(self):
+        path = self.library.embed_log_file(self.url, offset=70000, size=100000)
+        self.assertEqual(self.embedded(path), LOG[70000:170000])
+        self.assertEqual(self.server.requests, ['bytes=70000-169999'])
+
+    def test_offset_only(self):
+        path = self.library.embed_log_file(self.url, offset='150000')
+        self.assertEqual(self.embedded(path), LOG[150000:])
+
+    def test_tail(self):
+        path = self.library.embed_log_file(self.url, tail='70001')
+        self.assertEqual(self.embedded(path), LOG[-70001:])
+        self.assertEqual(self.server.requests, ['bytes=-70001'])
+
+    def test_gzip_only(self):
+        path = self.library.embed_log_file(self.url, offset=10, size=5000,
+                                           gzip_only='True')
+        self.assertTrue(path.endswith('realtime_1.log.gz'))
+        self.assertEqual(self.embedded(path), LOG[10:5010])
+
+
+class TestServerHonouringRange(_EmbedLogFile, unittest.TestCase):
+    ranges = True
+
+
+class TestServerIgnoringRange(_EmbedLogFile, unittest.TestCase):
+    ranges = False
+
+
+@unittest.skipIf(RealtimeUtils is None, 'requires Robot Framework')
+class TestLocalFile(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        FakeBuiltIn.variables = {'${OUTPUTDIR}': self.directory,
+                                 '${LOGFILE}': 'NONE'}
+        self._builtin = logdir.BuiltIn
+        logdir.BuiltIn = FakeBuiltIn
+        self.log = os.path.join(self.directory, 'app.log')
+        with open(self.log, 'wb') as f:
+            f.write(LOG)
+        self.library = RealtimeUtils.RealtimeUtils()
+
+    def tearDown(self):
+        logdir.BuiltIn = self._builtin
+        shutil.rmtree(self.directory)
+
+    def read(self, path):
+        zf = zipfile.ZipFile(path)
+        try:
+            return zf.read('app.log')
+        finally:
+            zf.close()
+
+    def test_whole_file_is_added_as_it_is(self):
+        path = self.library.embed_log_file(self.log, 'app')
+        self.assertEqual(self.read(path), LOG)
+
+    def test_part_of_file(self):
+        path = self.library.embed_log_file(self.log, 'app', offset=5, size=90000)
+        self.assertEqual(self.read(path), LOG[5:90005])
+        path = self.library.embed_log_file(self.log, 'app', tail=100)
+        self.assertEqual(self.read(path), LOG[-100:])
+
+
+if __name__ == '__main__':
+    unittest.main()
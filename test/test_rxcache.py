@@ -0,0 +1,116 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+import rxcache
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeElement(object):
+
+    def __init__(self):
+        self.Valid = True
+
+
+class Button(object):
+    """ Stub of ranorex adapter, counts lookups made by constructing it
+    """
+    lookups = 0
+
+    def __init__(self, locator):
+        Button.lookups += 1
+        self.locator = locator
+        self.Element = FakeElement()
+
+
+class Text(Button):
+    pass
+
+
+class BrokenElement(object):
+
+    @property
+    def Valid(self):
+        raise RuntimeError('element is gone')
+
+
+class TestElementCache(unittest.TestCase):
+
+    def setUp(self):
+        Button.lookups = 0
+        self.clock = FakeClock()
+        self.cache = rxcache.ElementCache(enabled=True, ttl=5.0,
+                                          clock=self.clock)
+
+    def test_disabled_cache_looks_up_every_time(self):
+        self.cache.enabled = False
+        self.cache.find(Button, '/form/button')
+        self.cache.find(Button, '/form/button')
+        self.assertEqual(Button.lookups, 2)
+        self.assertEqual(self.cache.statistics()['size'], 0)
+
+    def test_hit_within_ttl(self):
+        first = self.cache.find(Button, '/form/button')
+        self.clock.now = 4.9
+        self.assertIs(self.cache.find(Button, '/form/button'), first)
+        self.assertEqual(Button.lookups, 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_expired_entry_is_looked_up_again(self):
+        first = self.cache.find(Button, '/form/button')
+        self.clock.now = 5.1
+        self.assertIsNot(self.cache.find(Button, '/form/button'), first)
+        self.assertEqual(Button.lookups, 2)
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_invalid_element_is_evicted(self):
+        first = self.cache.find(Button, '/form/button')
+        first.Element.Valid = False
+        self.assertIsNot(self.cache.find(Button, '/form/button'), first)
+        self.assertEqual(Button.lookups, 2)
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_failing_validity_probe_counts_as_invalid(self):
+        first = self.cache.find(Button, '/form/button')
+        first.Element = BrokenElement()
+        self.assertIsNot(self.cache.find(Button, '/form/button'), first)
+        self.assertEqual(Button.lookups, 2)
+
+    def test_validation_can_be_disabled(self):
+        self.cache.validate = False
+        first = self.cache.find(Button, '/form/button')
+        first.Element = BrokenElement()
+        self.assertIs(self.cache.find(Button, '/form/button'), first)
+        self.assertEqual(Button.lookups, 1)
+
+    def test_other_adapter_type_is_looked_up(self):
+        self.cache.find(Button, '/form/text')
+        self.assertIsInstance(self.cache.find(Text, '/form/text'), Text)
+        self.assertEqual(Button.lookups, 2)
+
+    def test_clear(self):
+        self.cache.find(Button, '/form/button')
+        self.cache.clear()
+        self.cache.find(Button, '/form/button')
+        self.assertEqual(Button.lookups, 2)
+
+    def test_statistics(self):
+        self.cache.find(Button, '/form/button')
+        self.cache.find(Button, '/form/button')
+        self.assertEqual(self.cache.statistics(),
+                         {'enabled': True, 'ttl': 5.0, 'size': 1, 'hits': 1,
+                          'misses': 1, 'evictions': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+import rxpath
+
+
+class TestParse(unittest.TestCase):
+
+    def test_target_of_simple_locator(self):
+        self.assertEqual(rxpath.parse("/form[@processname='notepad']/text").target,
+                         'text')
+
+    def test_slash_inside_predicate(self):
+        locator = rxpath.parse("/form/text[@caption='a / b']")
+        self.assertEqual(locator.target, 'text')
+        self.assertEqual(locator.steps[-1].predicates, ("@caption='a / b'",))
+
+    def test_nested_predicates(self):
+        locator = rxpath.parse("/form/row[cell[@text='x']]/cell")
+        self.assertEqual(locator.target, 'cell')
+        self.assertEqual(locator.steps[1].predicates, ("cell[@text='x']",))
+
+    def test_parent_hops(self):
+        locator = rxpath.parse("/form/table/row/cell[@text='x']/../..")
+        self.assertEqual(locator.target, 'table')
+
+    def test_parent_hop_above_root_fails(self):
+        self.assertRaises(AssertionError, rxpath.parse, "/form/../..")
+
+    def test_descendant_axis(self):
+        locator = rxpath.parse("/form//container/button")
+        self.assertEqual([step.axis for step in locator.steps],
+                         ['child', 'descendant', 'child'])
+        self.assertEqual(locator.canonical, '/form//container/button')
+
+    def test_explicit_axis(self):
+        locator = rxpath.parse("/form/button/ancestor::Container")
+        self.assertEqual(locator.steps[-1].axis, 'ancestor')
+        self.assertEqual(locator.target, 'Container')
+        self.assertEqual(locator.canonical, '/form/button/ancestor::container')
+
+    def test_canonical_form(self):
+        self.assertEqual(rxpath.parse("/Form[ @title = 'a' ] / Button").canonical,
+                         "/form[@title = 'a']/button")
+
+    def test_unterminated_predicate_fails(self):
+        self.assertRaises(AssertionError, rxpath.parse, "/form[@title='a'")
+
+    def test_parse_is_cached(self):
+        locator = "/form[@processname='cached']/button"
+        self.assertTrue(rxpath.parse(locator) is rxpath.parse(locator))
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_least_recently_used_is_dropped(self):
+        cache = rxpath.LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.statistics()['size'], 2)
+
+    def test_shared_between_threads(self):
+        cache = rxpath.LRUCache(16)
+
+        def worker(start):
+            for index in range(2000):
+                key = (start + index) % 64
+                if cache.get(key) is None:
+                    cache.put(key, index)
+
+        threads = [threading.Thread(target=worker, args=(start,))
+                   for start in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        statistics = cache.statistics()
+        self.assertEqual(statistics['size'], 16)
+        self.assertEqual(statistics['hits'] + statistics['misses'], 16000)
+
+
+if __name__ == '__main__':
+    unittest.main()
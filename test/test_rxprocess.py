@@ -0,0 +1,84 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+import rxprocess
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeBackend(object):
+    """ Returns given image names and counts enumerations
+    """
+    name = 'fake'
+
+    def __init__(self, *names):
+        self.names = list(names)
+        self.calls = 0
+
+    def image_names(self):
+        self.calls += 1
+        return list(self.names)
+
+
+class TestImageKey(unittest.TestCase):
+
+    def test_extension_and_case_are_ignored(self):
+        self.assertEqual(rxprocess.image_key(' Notepad.EXE '), 'notepad')
+        self.assertEqual(rxprocess.image_key('notepad'), 'notepad')
+
+
+class TestProcessInventory(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.backend = FakeBackend('notepad.exe', 'Notepad.exe', 'calc.exe')
+        self.inventory = rxprocess.ProcessInventory(self.backend, ttl=0.5,
+                                                    clock=self.clock)
+
+    def test_exact_matching(self):
+        self.assertTrue(self.inventory.is_running('notepad.exe'))
+        self.assertTrue(self.inventory.is_running('NOTEPAD'))
+        self.assertFalse(self.inventory.is_running('note'))
+        self.assertFalse(self.inventory.is_running('notepad.exe.bak'))
+        self.assertEqual(self.inventory.count('notepad'), 2)
+
+    def test_snapshot_is_reused_within_ttl(self):
+        self.inventory.is_running('notepad')
+        self.clock.now = 0.5
+        self.inventory.is_running('calc')
+        self.assertEqual(self.backend.calls, 1)
+        self.assertEqual(self.inventory.hits, 1)
+
+    def test_snapshot_is_refreshed_after_ttl(self):
+        self.assertTrue(self.inventory.is_running('calc'))
+        self.backend.names.remove('calc.exe')
+        self.clock.now = 0.6
+        self.assertFalse(self.inventory.is_running('calc'))
+        self.assertEqual(self.backend.calls, 2)
+
+    def test_invalidate_forces_refresh(self):
+        self.inventory.is_running('notepad')
+        self.inventory.invalidate()
+        self.inventory.is_running('notepad')
+        self.assertEqual(self.backend.calls, 2)
+
+    def test_statistics(self):
+        self.inventory.is_running('notepad')
+        self.inventory.is_running('notepad')
+        self.assertEqual(self.inventory.statistics(),
+                         {'backend': 'fake', 'ttl': 0.5, 'hits': 1,
+                          'refreshes': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
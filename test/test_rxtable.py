@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+import rxtable
+
+
+class Cell(object):
+
+    def __init__(self, text):
+        self.Text = text
+
+
+class Element(object):
+
+    def __init__(self, value):
+        self.value = value
+
+    def GetAttributeValue(self, name):
+        assert name == 'Value'
+        return self.value
+
+
+class Row(object):
+
+    def __init__(self, texts, value=None):
+        self.Cells = [Cell(text) for text in texts]
+        self.Element = Element(value)
+
+
+class Table(object):
+    """ Stub of ranorex table adapter
+    """
+    def __init__(self, rows):
+        self.Rows = rows
+
+
+def table(count=5, values=True):
+    return Table([Row(['r%dc%d' % (row, col) for col in range(3)],
+                      ';'.join('r%dc%d' % (row, col) for col in range(3))
+                      if values else None)
+                  for row in range(count)])
+
+
+class TestColumns(unittest.TestCase):
+
+    def test_indexes_and_names(self):
+        headers = ['Id', ' Name ', 'Price']
+        self.assertEqual(rxtable.parse_columns('2, name', headers), [2, 1])
+        self.assertEqual(rxtable.parse_columns('*'), None)
+        self.assertTrue(rxtable.has_names('0,Name'))
+        self.assertFalse(rxtable.has_names('0,2'))
+
+    def test_unknown_name(self):
+        self.assertRaises(AssertionError, rxtable.parse_columns, 'size',
+                          ['Id'])
+
+    def test_project_pads_missing_columns(self):
+        self.assertEqual(rxtable.project(['a', 'b'], [1, 5]), ['b', ''])
+
+
+class TestClipboard(unittest.TestCase):
+
+    def test_tab_separated_rows(self):
+        self.assertEqual(rxtable.parse_clipboard(u'a\tb\r\n\xe4\t"c\td"\r\n'),
+                         [[u'a', u'b'], [u'\xe4', u'c\td']])
+
+
+class TestTableReader(unittest.TestCase):
+
+    def test_unknown_mode(self):
+        self.assertRaises(AssertionError, rxtable.TableReader, table(),
+                          mode='html')
+
+    def test_cells_mode_reads_only_selected(self):
+        reader = rxtable.TableReader(table(), columns=[2, 0], offset=1,
+                                     limit=2)
+        self.assertEqual(list(reader.rows()),
+                         [['r1c2', 'r1c0'], ['r2c2', 'r2c0']])
+        # Rows, and Cells plus two texts for each of the two rows
+        self.assertEqual(reader.calls, 7)
+
+    def test_limit_past_end(self):
+        reader = rxtable.TableReader(table(3), offset=2, limit=10)
+        self.assertEqual(list(reader.rows()), [['r2c0', 'r2c1', 'r2c2']])
+
+    def test_rows_mode_reads_row_value(self):
+        reader = rxtable.TableReader(table(), mode='rows', columns=[1])
+        self.assertEqual(list(reader.rows()),
+                         [['r%dc1' % row] for row in range(5)])
+        # Rows, width once and value of each row
+        self.assertEqual(reader.calls, 7)
+
+    def test_rows_mode_falls_back_to_cells(self):
+        reader = rxtable.TableReader(table(2, values=False), mode='rows')
+        self.assertEqual(list(reader.rows()),
+                         [['r0c0', 'r0c1', 'r0c2'], ['r1c0', 'r1c1', 'r1c2']])
+
+    def test_rows_mode_null_values(self):
+        stub = Table([Row(['a', '', 'c'], 'a;(null);c')])
+        reader = rxtable.TableReader(stub, mode='rows')
+        self.assertEqual(list(reader.rows()), [['a', '', 'c']])
+
+    def test_select_read_rows(self):
+        reader = rxtable.TableReader(None, mode='clipboard', columns=[0],
+                                     offset=1, limit=1)
+        self.assertEqual(reader.select([['a', 'b'], ['c', 'd'], ['e', 'f']]),
+                         [['c']])
+
+
+if __name__ == '__main__':
+    unittest.main()
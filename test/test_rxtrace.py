@@ -0,0 +1,111 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+import rxtrace
+
+
+class SteppingClock(object):
+    """ Returns times from a list, one for every read
+    """
+    def __init__(self, *times):
+        self.times = list(times)
+
+    def __call__(self):
+        return self.times.pop(0)
+
+
+def spans(tracer):
+    return [(event['name'], event['ts'], event['dur'])
+            for event in tracer.chrome_trace()['traceEvents']]
+
+
+class TestTracer(unittest.TestCase):
+
+    def test_act_is_time_between_last_phase_and_settle(self):
+        # keyword 0-10, find 1-3, act 3-7, settle 7-9
+        tracer = rxtrace.Tracer(clock=SteppingClock(0, 1, 3, 7, 9, 10))
+        with tracer.keyword('click_element', ('/form/button',)):
+            with tracer.span('find'):
+                pass
+            with tracer.span('settle'):
+                pass
+        self.assertEqual(spans(tracer),
+                         [('find', 1e6, 2e6), ('act', 3e6, 4e6),
+                          ('settle', 7e6, 2e6),
+                          ('click_element', 0.0, 10e6)])
+
+    def test_act_ends_with_keyword_without_settle(self):
+        tracer = rxtrace.Tracer(clock=SteppingClock(0, 1, 2, 5))
+        with tracer.keyword('get_text'):
+            with tracer.span('find'):
+                pass
+        self.assertEqual(spans(tracer),
+                         [('find', 1e6, 1e6), ('act', 2e6, 3e6),
+                          ('get_text', 0.0, 5e6)])
+
+    def test_nested_keywords_have_own_phases(self):
+        # outer 0-10 runs inner 1-4 which finds 2-3
+        tracer = rxtrace.Tracer(clock=SteppingClock(0, 1, 2, 3, 4, 10))
+        with tracer.keyword('outer'):
+            with tracer.keyword('inner'):
+                with tracer.span('find'):
+                    pass
+        self.assertEqual(spans(tracer),
+                         [('find', 2e6, 1e6), ('act', 3e6, 1e6),
+                          ('inner', 1e6, 3e6), ('act', 0.0, 10e6),
+                          ('outer', 0.0, 10e6)])
+
+    def test_failure_and_locator_are_recorded(self):
+        tracer = rxtrace.Tracer(clock=SteppingClock(0, 1))
+        try:
+            with tracer.keyword('click_element', ('/form/button',)):
+                raise AssertionError('not found')
+        except AssertionError:
+            pass
+        event = tracer.chrome_trace()['traceEvents'][-1]
+        self.assertEqual(event['args'], {'locator': '/form/button',
+                                         'failed': True})
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = rxtrace.Tracer(clock=SteppingClock())
+        tracer.enabled = False
+        with tracer.keyword('click_element'):
+            with tracer.span('find'):
+                pass
+        self.assertEqual(spans(tracer), [])
+
+    def test_ring_buffer_keeps_latest_spans(self):
+        tracer = rxtrace.Tracer(size=2, clock=SteppingClock(*range(6)))
+        for name in 'abc':
+            with tracer.span(name):
+                pass
+        self.assertEqual([span[0] for span in spans(tracer)], ['b', 'c'])
+        tracer.resize(1)
+        self.assertEqual([span[0] for span in spans(tracer)], ['c'])
+
+
+class TestTraced(unittest.TestCase):
+
+    def test_wrapper_keeps_keyword_and_its_arguments(self):
+        tracer = rxtrace.Tracer(clock=SteppingClock(0, 1))
+
+        class Library(object):
+            @rxtrace.traced(tracer)
+            def click_element(self, locator, location=None):
+                """ Clicks element """
+                return locator
+
+        self.assertEqual(Library().click_element('/form'), '/form')
+        method = Library.click_element
+        self.assertEqual(method.__name__, 'click_element')
+        self.assertEqual(method.__doc__, ' Clicks element ')
+        self.assertEqual(method.robot_wrapped.__code__.co_varnames[:3],
+                         ('self', 'locator', 'location'))
+        self.assertEqual(spans(tracer)[-1], ('click_element', 0.0, 1e6))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+import rxtree
+
+
+class Node(object):
+    """ Stub of ranorex element, counts how many nodes were visited
+    """
+    visited = 0
+
+    def __init__(self, label, names, children=()):
+        self.label = label
+        self.names = set(names)
+        self._children = list(children)
+
+    @property
+    def Children(self):
+        for child in self._children:
+            Node.visited += 1
+            yield child
+
+
+def names_of(node):
+    return node.names
+
+
+def labels(nodes):
+    return [node.label for node in nodes]
+
+
+def tree():
+    # list
+    # +- a (listitem)
+    # +- group (container)
+    # |  +- b (listitem)
+    # |  +- inner (container)
+    # |     +- c (listitem)
+    # +- d (listitem, checkbox)
+    return Node('list', ['list'], [
+        Node('a', ['listitem']),
+        Node('group', ['container'], [
+            Node('b', ['listitem']),
+            Node('inner', ['container'], [Node('c', ['listitem'])])]),
+        Node('d', ['listitem', 'checkbox'])])
+
+
+def select(locator, max_depth=None, root=None):
+    return labels(rxtree.select(root or tree(), rxtree.simple_steps(locator),
+                                names_of, max_depth))
+
+
+class TestSimpleSteps(unittest.TestCase):
+
+    def test_walkable_locators(self):
+        for locator in ('listitem', './/listitem', 'container/*',
+                        'self::list/listitem'):
+            self.assertNotEqual(rxtree.simple_steps(locator), None, locator)
+
+    def test_locators_needing_ranorex(self):
+        for locator in ("listitem[@text='a']", '/form/listitem',
+                        'container/../listitem', 'ancestor::list',
+                        './/container//listitem'):
+            self.assertEqual(rxtree.simple_steps(locator), None, locator)
+
+
+class TestSelect(unittest.TestCase):
+
+    def test_child_step(self):
+        self.assertEqual(select('listitem'), ['a', 'd'])
+
+    def test_descendant_step_in_document_order(self):
+        self.assertEqual(select('.//listitem'), ['a', 'b', 'c', 'd'])
+
+    def test_single_descendant_step_yields_each_node_once(self):
+        self.assertEqual(select('.//container/listitem'), ['b', 'c'])
+        self.assertEqual(select('container//listitem'), ['b', 'c'])
+
+    def test_chained_descendant_steps_would_repeat_nodes(self):
+        # inner is a container inside group, so c is below both of them
+        steps = rxtree.simple_steps('.//container')
+        steps += rxtree.simple_steps('.//listitem')
+        self.assertEqual(labels(rxtree.select(tree(), steps, names_of)),
+                         ['b', 'c', 'c'])
+        self.assertEqual(rxtree.simple_steps('.//container//listitem'), None)
+
+    def test_max_depth(self):
+        self.assertEqual(select('.//listitem', max_depth=2), ['a', 'b', 'd'])
+
+    def test_any_capability_matches(self):
+        self.assertEqual(select('checkbox'), ['d'])
+
+    def test_wildcard(self):
+        self.assertEqual(select('container/*'), ['b', 'inner'])
+
+    def test_self_axis_checks_name(self):
+        self.assertEqual(select('self::list/listitem'), ['a', 'd'])
+        self.assertEqual(select('self::table/listitem'), [])
+
+    def test_paging_visits_only_needed_nodes(self):
+        root = Node('list', ['list'],
+                    [Node(str(index), ['listitem']) for index in range(1000)])
+        Node.visited = 0
+        nodes = rxtree.page(rxtree.select(root, rxtree.simple_steps('listitem'),
+                                          names_of), offset=10, limit=5)
+        self.assertEqual(labels(nodes), ['10', '11', '12', '13', '14'])
+        self.assertEqual(Node.visited, 15)
+
+    def test_count(self):
+        self.assertEqual(rxtree.count(iter(range(7))), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
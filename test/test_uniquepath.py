@@ -0,0 +1,82 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
+import uniquepath
+
+
+class TestAllocate(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        uniquepath.forget()
+
+    def tearDown(self):
+        uniquepath.forget()
+        shutil.rmtree(self.directory)
+
+    def touch(self, name):
+        open(os.path.join(self.directory, name), 'w').close()
+
+    def allocate(self, basename='screenshot', ext='.jpg'):
+        return os.path.basename(uniquepath.allocate(self.directory, basename,
+                                                    ext))
+
+    def test_first_index_creates_file(self):
+        self.assertEqual(self.allocate(), 'screenshot_1.jpg')
+        self.assertTrue(os.path.isfile(os.path.join(self.directory,
+                                                    'screenshot_1.jpg')))
+
+    def test_scan_continues_after_highest_index(self):
+        for name in ('screenshot_2.jpg', 'screenshot_7.jpg',
+                     'screenshot_9.png', 'other_12.jpg', 'screenshot_x.jpg'):
+            self.touch(name)
+        self.assertEqual(self.allocate(), 'screenshot_8.jpg')
+        self.assertEqual(self.allocate(), 'screenshot_9.jpg')
+        self.assertEqual(self.allocate(ext='.png'), 'screenshot_10.png')
+
+    def test_directory_is_scanned_only_once(self):
+        self.assertEqual(self.allocate(), 'screenshot_1.jpg')
+        # not seen because indices now come from memory
+        self.touch('screenshot_5.jpg')
+        self.assertEqual(self.allocate(), 'screenshot_2.jpg')
+
+    def test_file_created_by_another_writer_is_skipped(self):
+        self.assertEqual(self.allocate(), 'screenshot_1.jpg')
+        self.touch('screenshot_2.jpg')
+        self.touch('screenshot_3.jpg')
+        self.assertEqual(self.allocate(), 'screenshot_4.jpg')
+        self.assertEqual(self.allocate(), 'screenshot_5.jpg')
+
+    def test_forget_scans_again(self):
+        self.allocate()
+        self.touch('screenshot_5.jpg')
+        uniquepath.forget(self.directory)
+        self.assertEqual(self.allocate(), 'screenshot_6.jpg')
+
+    def test_forget_other_directory_keeps_indices(self):
+        self.allocate()
+        self.touch('screenshot_5.jpg')
+        uniquepath.forget(tempfile.gettempdir())
+        self.assertEqual(self.allocate(), 'screenshot_2.jpg')
+
+    def test_basename_with_path(self):
+        os.mkdir(os.path.join(self.directory, 'sub'))
+        path = uniquepath.allocate(self.directory, os.path.join('sub', 'pic'),
+                                   '.png')
+        self.assertEqual(path, os.path.join(self.directory, 'sub', 'pic_1.png'))
+        self.assertTrue(os.path.isfile(path))
+
+    def test_missing_directory_returns_first_path_without_creating(self):
+        missing = os.path.join(self.directory, 'missing')
+        path = uniquepath.allocate(missing, 'log', '.zip')
+        self.assertEqual(path, os.path.join(missing, 'log_1.zip'))
+        self.assertFalse(os.path.exists(missing))
+
+
+if __name__ == '__main__':
+    unittest.main()